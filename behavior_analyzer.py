@@ -78,6 +78,9 @@ class BehaviorAnalyzer:
     def _detect_spending_anomalies(self, df: pd.DataFrame) -> Dict:
         """Detect anomalous spending behavior"""
         anomalies = self.markov_model.detect_anomalies(df, threshold=0.1)
+        if not anomalies.empty:
+            # Display-ready dates, formatted once here rather than on every render
+            anomalies['date_str'] = pd.to_datetime(anomalies['date']).dt.strftime('%Y-%m-%d')
         
         analysis = {
             'total_anomalies': len(anomalies),
@@ -2,6 +2,12 @@ import pandas as pd
 import re
 from typing import Dict, List
 
+# Keywords that suggest the income type of a recurring credit (matched on lowercased details)
+SALARY_PATTERN = re.compile('salary|wage|payroll')
+BUSINESS_PATTERN = re.compile('business|sales|payment|invoice')
+FREELANCE_PATTERN = re.compile('freelance|consulting|contract')
+TRANSFER_PATTERN = re.compile('received from|transfer from')
+
 class ExpenseCategorizer:
     def __init__(self, custom_mappings: Dict[str, str] = None, user_income_sources: Dict[str, List[str]] = None):
         self.custom_mappings = custom_mappings if custom_mappings is not None else {}
@@ -224,19 +230,19 @@ class ExpenseCategorizer:
             details_lower = str(details).lower()
             
             # Suggest based on patterns
-            if any(word in details_lower for word in ['salary', 'wage', 'payroll']):
+            if SALARY_PATTERN.search(details_lower):
                 if 'Salary' not in suggestions:
                     suggestions['Salary'] = []
                 suggestions['Salary'].append(details)
-            elif any(word in details_lower for word in ['business', 'sales', 'payment', 'invoice']):
+            elif BUSINESS_PATTERN.search(details_lower):
                 if 'Business Income' not in suggestions:
                     suggestions['Business Income'] = []
                 suggestions['Business Income'].append(details)
-            elif any(word in details_lower for word in ['freelance', 'consulting', 'contract']):
+            elif FREELANCE_PATTERN.search(details_lower):
                 if 'Freelance' not in suggestions:
                     suggestions['Freelance'] = []
                 suggestions['Freelance'].append(details)
-            elif any(word in details_lower for word in ['received from', 'transfer from']) and row['Count'] >= 2:
+            elif TRANSFER_PATTERN.search(details_lower) and row['Count'] >= 2:
                 if 'Regular Transfers' not in suggestions:
                     suggestions['Regular Transfers'] = []
                 suggestions['Regular Transfers'].append(details)
@@ -5,212 +5,273 @@ Demo script showing the Markov Chain behavior analysis functionality
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-import random
+from functools import lru_cache
 
 from markov_predictor import MarkovChainPredictor
 from behavior_analyzer import BehaviorAnalyzer
 
+# Sampling distributions, normalized once for Generator.choice
+DAILY_TRANSACTION_COUNTS = np.array([1, 2, 3, 4, 5])
+DAILY_TRANSACTION_WEIGHTS = np.array([10, 30, 35, 20, 5])
+DAILY_TRANSACTION_PROBS = DAILY_TRANSACTION_WEIGHTS / DAILY_TRANSACTION_WEIGHTS.sum()
+TRANSACTION_HOURS = np.array([8, 9, 10, 11, 12, 13, 14, 15, 16, 17, 18, 19, 20, 21])
+TRANSACTION_HOUR_WEIGHTS = np.array([5, 10, 15, 10, 15, 10, 15, 10, 5, 5, 5, 5, 3, 2])
+TRANSACTION_HOUR_PROBS = TRANSACTION_HOUR_WEIGHTS / TRANSACTION_HOUR_WEIGHTS.sum()
+
+# Transaction templates (details, base amount) per category, either by time
+# of day or shared across the whole day
+TRANSACTION_DETAILS = {
+    'Food': {
+        'morning': [('BREAKFAST AT JAVA HOUSE', 800), ('NAIVAS GROCERIES', 2500), ('MILK AND BREAD', 300)],
+        'afternoon': [('LUNCH AT KFC', 1200), ('CARREFOUR SHOPPING', 4500), ('RESTAURANT BILL', 1800)],
+        'evening': [('DINNER AT PIZZA INN', 2200), ('UBER EATS DELIVERY', 1500), ('GROCERY SHOPPING', 3200)],
+        'night': [('LATE NIGHT SNACKS', 500), ('24HR SUPERMARKET', 800)]
+    },
+    'Transport': {
+        'morning': [('UBER TO OFFICE', 450), ('MATATU FARE', 100), ('FUEL STATION', 3000)],
+        'afternoon': [('TAXI RIDE', 600), ('BUS FARE', 80), ('PARKING FEE', 200)],
+        'evening': [('UBER HOME', 520), ('MATATU FARE', 120), ('FUEL TOP UP', 2000)],
+        'night': [('LATE NIGHT TAXI', 800), ('UBER RIDE', 650)]
+    },
+    'Entertainment': {
+        'morning': [('GYM MEMBERSHIP', 3000), ('SPORTS BETTING', 500)],
+        'afternoon': [('CINEMA TICKET', 800), ('GAMING', 1200)],
+        'evening': [('BAR BILL', 2500), ('CLUB ENTRY', 1000), ('MOVIE NIGHT', 1500)],
+        'night': [('NIGHTCLUB BILL', 4000), ('LATE NIGHT ENTERTAINMENT', 2000)]
+    },
+    'Shopping': {
+        'morning': [('PHARMACY PURCHASE', 800), ('BOOKSHOP', 1500)],
+        'afternoon': [('CLOTHING STORE', 3500), ('ELECTRONICS SHOP', 8000), ('JUMIA ORDER', 2200)],
+        'evening': [('SUPERMARKET SHOPPING', 4200), ('FASHION STORE', 2800)],
+        'night': [('ONLINE SHOPPING', 1800)]
+    },
+    'Utilities': [
+        ('KPLC ELECTRICITY BILL', 2800),
+        ('SAFARICOM POSTPAID', 1500),
+        ('ZUKU INTERNET', 3500),
+        ('NAIROBI WATER', 1200),
+        ('DSTV SUBSCRIPTION', 2200)
+    ],
+    'Health': [
+        ('HOSPITAL VISIT', 3500),
+        ('PHARMACY MEDICINE', 1200),
+        ('DENTAL CHECKUP', 4000),
+        ('LAB TESTS', 2500),
+        ('NHIF CONTRIBUTION', 1500)
+    ],
+    'Airtime': [
+        ('SAFARICOM AIRTIME', 500),
+        ('DATA BUNDLE', 1000),
+        ('AIRTEL AIRTIME', 300),
+        ('INTERNET BUNDLE', 1500)
+    ]
+}
+
+TIME_PERIODS = ['morning', 'afternoon', 'evening', 'night']
+TIME_PERIOD_IDS = {period: i for i, period in enumerate(TIME_PERIODS)}
+DETAIL_CATEGORY_IDS = {category: i for i, category in enumerate(TRANSACTION_DETAILS)}
+
+def _flatten_transaction_details():
+    """Flatten TRANSACTION_DETAILS into arrays sliced by category_id * len(TIME_PERIODS) + time_id"""
+    details, amounts, offset_lo, offset_hi = [], [], [], []
+    
+    for options_by_time in TRANSACTION_DETAILS.values():
+        for time_period in TIME_PERIODS:
+            if isinstance(options_by_time, dict):
+                options = options_by_time.get(time_period, options_by_time['afternoon'])
+            else:
+                options = options_by_time
+            
+            offset_lo.append(len(details))
+            details.extend(detail for detail, _ in options)
+            amounts.extend(amount for _, amount in options)
+            offset_hi.append(len(details))
+    
+    return (
+        np.array(details, dtype=object),
+        np.array(amounts, dtype=np.int32),
+        np.array(offset_lo, dtype=np.int32),
+        np.array(offset_hi, dtype=np.int32)
+    )
+
+_DETAILS_FLAT, _AMOUNTS_FLAT, _OFFSET_LO, _OFFSET_HI = _flatten_transaction_details()
+# Only time-of-day templates get their amounts varied
+_VARIES_BY_TIME = np.array([isinstance(options, dict) for options in TRANSACTION_DETAILS.values()])
+
+# User behavioral patterns: likely categories per time of day and weekday
+TIME_PATTERNS = {
+    'morning': ['Food', 'Transport', 'Airtime'],
+    'afternoon': ['Food', 'Shopping', 'Health'],
+    'evening': ['Food', 'Entertainment', 'Transport'],
+    'night': ['Entertainment', 'Food']
+}
+
+WEEKDAY_PATTERNS = {
+    'Monday': ['Transport', 'Food', 'Utilities'],
+    'Tuesday': ['Food', 'Shopping'],
+    'Wednesday': ['Food', 'Health', 'Transport'],
+    'Thursday': ['Food', 'Entertainment'],
+    'Friday': ['Food', 'Entertainment', 'Shopping'],
+    'Saturday': ['Shopping', 'Entertainment', 'Food'],
+    'Sunday': ['Food', 'Entertainment']
+}
+
+WEEKDAYS = list(WEEKDAY_PATTERNS)  # ordered as datetime.weekday()
+CATEGORY_NAMES = np.array(list(TRANSACTION_DETAILS), dtype=object)
+
+def _hour_time_period(hour):
+    """Convert hour to time period"""
+    if 5 <= hour < 12:
+        return 'morning'
+    elif 12 <= hour < 17:
+        return 'afternoon'
+    elif 17 <= hour < 21:
+        return 'evening'
+    else:
+        return 'night'
+
+HOUR_TIME_IDS = np.array([TIME_PERIOD_IDS[_hour_time_period(hour)] for hour in range(24)])
+
+def _build_category_candidates():
+    """Candidate category ids per weekday * len(TIME_PERIODS) + time_id, padded into a table"""
+    candidates = [
+        [DETAIL_CATEGORY_IDS[category] for category in WEEKDAY_PATTERNS[day] + TIME_PATTERNS[period]]
+        for day in WEEKDAYS
+        for period in TIME_PERIODS
+    ]
+    table = np.zeros((len(candidates), max(map(len, candidates))), dtype=np.int32)
+    for i, ids in enumerate(candidates):
+        table[i, :len(ids)] = ids
+    return table, np.array([len(ids) for ids in candidates], dtype=np.int32)
+
+_CATEGORY_CANDIDATES, _CATEGORY_CANDIDATE_COUNTS = _build_category_candidates()
+
+def _generate_codes(n_days, start_weekday, rng):
+    """Sample integer codes for every generated transaction in one batch"""
+    
+    # Number of transactions per day (1-5), then per-transaction day offsets
+    counts = rng.choice(DAILY_TRANSACTION_COUNTS, size=n_days, p=DAILY_TRANSACTION_PROBS)
+    day_offsets = np.repeat(np.arange(n_days), counts)
+    n = len(day_offsets)
+    
+    # Time of day
+    hours = rng.choice(TRANSACTION_HOURS, size=n, p=TRANSACTION_HOUR_PROBS)
+    minutes = rng.integers(0, 60, n)
+    weekdays = (start_weekday + day_offsets) % 7
+    time_ids = HOUR_TIME_IDS[hours]
+    
+    # Choose category uniformly among the combined weekday and time patterns
+    combo = weekdays * len(TIME_PERIODS) + time_ids
+    candidate_pick = (rng.random(n) * _CATEGORY_CANDIDATE_COUNTS[combo]).astype(np.int32)
+    category_ids = _CATEGORY_CANDIDATES[combo, candidate_pick]
+    
+    # Pick a transaction template for the category and time of day
+    slot = category_ids * len(TIME_PERIODS) + time_ids
+    detail_ids = rng.integers(_OFFSET_LO[slot], _OFFSET_HI[slot])
+    amounts = _AMOUNTS_FLAT[detail_ids].astype(np.int64)
+    
+    # Add some variation to time-of-day amounts
+    variation = rng.integers(-(amounts * 0.2).astype(np.int64), (amounts * 0.3).astype(np.int64) + 1)
+    amounts = np.where(_VARIES_BY_TIME[category_ids], amounts + variation, amounts)
+    amounts = np.maximum(amounts, 50)  # Minimum amount of 50
+    
+    return day_offsets, hours, minutes, weekdays, category_ids, detail_ids, amounts
+
 def create_realistic_transaction_data():
     """Create realistic transaction data with behavioral patterns"""
     
-    # Set random seed for reproducible results
-    np.random.seed(42)
-    random.seed(42)
+    # Single seeded generator for reproducible results
+    rng = np.random.default_rng(42)
     
-    transactions = []
     start_date = datetime(2024, 1, 1)
     
-    # Define user behavioral patterns
-    patterns = {
-        'morning': ['Food', 'Transport', 'Airtime'],
-        'afternoon': ['Food', 'Shopping', 'Health'],
-        'evening': ['Food', 'Entertainment', 'Transport'],
-        'night': ['Entertainment', 'Food']
-    }
-    
-    weekday_patterns = {
-        'Monday': ['Transport', 'Food', 'Utilities'],
-        'Tuesday': ['Food', 'Shopping'],
-        'Wednesday': ['Food', 'Health', 'Transport'],
-        'Thursday': ['Food', 'Entertainment'],
-        'Friday': ['Food', 'Entertainment', 'Shopping'],
-        'Saturday': ['Shopping', 'Entertainment', 'Food'],
-        'Sunday': ['Food', 'Entertainment']
-    }
-    
     # Generate 6 months of realistic transactions
-    current_date = start_date
-    transaction_id = 1
-    
-    while current_date < start_date + timedelta(days=180):
-        # Determine number of transactions for this day (1-5)
-        num_transactions = random.choices([1, 2, 3, 4, 5], weights=[10, 30, 35, 20, 5])[0]
-        
-        day_name = current_date.strftime('%A')
-        
-        for _ in range(num_transactions):
-            # Determine time of day
-            hour = random.choices(
-                [8, 9, 10, 11, 12, 13, 14, 15, 16, 17, 18, 19, 20, 21],
-                weights=[5, 10, 15, 10, 15, 10, 15, 10, 5, 5, 5, 5, 3, 2]
-            )[0]
-            
-            # Determine time period
-            if 5 <= hour < 12:
-                time_period = 'morning'
-            elif 12 <= hour < 17:
-                time_period = 'afternoon'
-            elif 17 <= hour < 21:
-                time_period = 'evening'
-            else:
-                time_period = 'night'
-            
-            # Choose category based on patterns
-            day_categories = weekday_patterns.get(day_name, ['Food', 'Transport'])
-            time_categories = patterns.get(time_period, ['Food'])
-            
-            # Combine and weight the categories
-            all_categories = day_categories + time_categories
-            category = random.choice(all_categories)
-            
-            # Generate realistic transaction details and amounts
-            details, amount = generate_transaction_details(category, day_name, time_period)
-            
-            # Add some income transactions
-            if random.random() < 0.05:  # 5% chance of income
-                if day_name == 'Friday' and random.random() < 0.8:  # Salary on Friday
-                    details = "SALARY PAYMENT FROM TECH CORP LTD"
-                    amount = 75000
-                    category = "Income"
-                elif random.random() < 0.3:  # Freelance income
-                    details = "FREELANCE PAYMENT CLIENT ABC"
-                    amount = random.randint(15000, 35000)
-                    category = "Income"
-                else:  # Other income
-                    details = "BUSINESS PAYMENT RECEIVED"
-                    amount = random.randint(5000, 20000)
-                    category = "Income"
-            
-            transaction_time = current_date.replace(hour=hour, minute=random.randint(0, 59))
-            
-            transactions.append({
-                'Date': transaction_time,
-                'Details': details,
-                'Amount': amount if category == 'Income' else -amount,
-                'Category': category,
-                'Type': 'Credit' if amount > 0 else 'Debit'
-            })
-            
-            transaction_id += 1
-        
-        current_date += timedelta(days=1)
+    day_offsets, hours, minutes, weekdays, category_ids, detail_ids, amounts_arr = _generate_codes(
+        180, start_date.weekday(), rng
+    )
+    n = len(day_offsets)
+    dates = (
+        np.datetime64(start_date, 'ns')
+        + day_offsets.astype('timedelta64[D]')
+        + hours.astype('timedelta64[h]')
+        + minutes.astype('timedelta64[m]')
+    )
+    details_arr = _DETAILS_FLAT[detail_ids]
+    categories_arr = CATEGORY_NAMES[category_ids]
+    
+    # Add some income transactions: 5% chance of income, salary on Fridays,
+    # otherwise freelance or other business income
+    is_income = rng.random(n) < 0.05
+    is_salary = is_income & (weekdays == WEEKDAYS.index('Friday')) & (rng.random(n) < 0.8)
+    is_freelance = is_income & ~is_salary & (rng.random(n) < 0.3)
+    is_other = is_income & ~is_salary & ~is_freelance
+    
+    details_arr = np.where(is_salary, "SALARY PAYMENT FROM TECH CORP LTD", details_arr)
+    details_arr = np.where(is_freelance, "FREELANCE PAYMENT CLIENT ABC", details_arr)
+    details_arr = np.where(is_other, "BUSINESS PAYMENT RECEIVED", details_arr)
+    amounts_arr = np.where(is_salary, 75000, amounts_arr)
+    amounts_arr = np.where(is_freelance, rng.integers(15000, 35001, n), amounts_arr)
+    amounts_arr = np.where(is_other, rng.integers(5000, 20001, n), amounts_arr)
+    categories_arr = np.where(is_income, "Income", categories_arr)
+    
+    signed_amounts = np.where(is_income, amounts_arr, -amounts_arr).astype(np.int64)
     
     # Add some anomalous transactions
-    anomaly_transactions = [
-        {
-            'Date': start_date + timedelta(days=45),
-            'Details': 'EXPENSIVE ELECTRONICS PURCHASE',
-            'Amount': -85000,
-            'Category': 'Shopping',
-            'Type': 'Debit'
-        },
-        {
-            'Date': start_date + timedelta(days=90),
-            'Details': 'LATE NIGHT GAMBLING',
-            'Amount': -25000,
-            'Category': 'Entertainment',
-            'Type': 'Debit'
-        },
-        {
-            'Date': start_date + timedelta(days=120),
-            'Details': 'EMERGENCY MEDICAL BILL',
-            'Amount': -45000,
-            'Category': 'Health',
-            'Type': 'Debit'
-        }
-    ]
-    
-    transactions.extend(anomaly_transactions)
+    anomaly_dates = np.array([
+        start_date + timedelta(days=45),
+        start_date + timedelta(days=90),
+        start_date + timedelta(days=120)
+    ], dtype='datetime64[ns]')
+    anomaly_details = np.array([
+        'EXPENSIVE ELECTRONICS PURCHASE',
+        'LATE NIGHT GAMBLING',
+        'EMERGENCY MEDICAL BILL'
+    ], dtype=object)
+    anomaly_amounts = np.array([-85000, -25000, -45000], dtype=np.int64)
+    anomaly_categories = np.array(['Shopping', 'Entertainment', 'Health'], dtype=object)
+    
+    all_amounts = np.concatenate([signed_amounts, anomaly_amounts])
     
     # Convert to DataFrame and sort by date
-    df = pd.DataFrame(transactions)
-    df = df.sort_values('Date').reset_index(drop=True)
+    df = pd.DataFrame({
+        'Date': np.concatenate([dates, anomaly_dates]),
+        'Details': pd.array(np.concatenate([details_arr, anomaly_details]), dtype='string[pyarrow]'),
+        'Amount': all_amounts,
+        'Category': np.concatenate([categories_arr, anomaly_categories]),
+        'Type': np.where(all_amounts > 0, 'Credit', 'Debit').astype(object)
+    }, copy=False)
+    df = df.sort_values('Date', kind='mergesort', ignore_index=True)
+    
+    # Low-cardinality labels are stored as categoricals
+    df['Category'] = df['Category'].astype('category')
+    df['Type'] = df['Type'].astype('category')
     
     return df
 
-def generate_transaction_details(category, day_name, time_period):
-    """Generate realistic transaction details and amounts"""
-    
-    details_map = {
-        'Food': {
-            'morning': [('BREAKFAST AT JAVA HOUSE', 800), ('NAIVAS GROCERIES', 2500), ('MILK AND BREAD', 300)],
-            'afternoon': [('LUNCH AT KFC', 1200), ('CARREFOUR SHOPPING', 4500), ('RESTAURANT BILL', 1800)],
-            'evening': [('DINNER AT PIZZA INN', 2200), ('UBER EATS DELIVERY', 1500), ('GROCERY SHOPPING', 3200)],
-            'night': [('LATE NIGHT SNACKS', 500), ('24HR SUPERMARKET', 800)]
-        },
-        'Transport': {
-            'morning': [('UBER TO OFFICE', 450), ('MATATU FARE', 100), ('FUEL STATION', 3000)],
-            'afternoon': [('TAXI RIDE', 600), ('BUS FARE', 80), ('PARKING FEE', 200)],
-            'evening': [('UBER HOME', 520), ('MATATU FARE', 120), ('FUEL TOP UP', 2000)],
-            'night': [('LATE NIGHT TAXI', 800), ('UBER RIDE', 650)]
-        },
-        'Entertainment': {
-            'morning': [('GYM MEMBERSHIP', 3000), ('SPORTS BETTING', 500)],
-            'afternoon': [('CINEMA TICKET', 800), ('GAMING', 1200)],
-            'evening': [('BAR BILL', 2500), ('CLUB ENTRY', 1000), ('MOVIE NIGHT', 1500)],
-            'night': [('NIGHTCLUB BILL', 4000), ('LATE NIGHT ENTERTAINMENT', 2000)]
-        },
-        'Shopping': {
-            'morning': [('PHARMACY PURCHASE', 800), ('BOOKSHOP', 1500)],
-            'afternoon': [('CLOTHING STORE', 3500), ('ELECTRONICS SHOP', 8000), ('JUMIA ORDER', 2200)],
-            'evening': [('SUPERMARKET SHOPPING', 4200), ('FASHION STORE', 2800)],
-            'night': [('ONLINE SHOPPING', 1800)]
-        },
-        'Utilities': [
-            ('KPLC ELECTRICITY BILL', 2800),
-            ('SAFARICOM POSTPAID', 1500),
-            ('ZUKU INTERNET', 3500),
-            ('NAIROBI WATER', 1200),
-            ('DSTV SUBSCRIPTION', 2200)
-        ],
-        'Health': [
-            ('HOSPITAL VISIT', 3500),
-            ('PHARMACY MEDICINE', 1200),
-            ('DENTAL CHECKUP', 4000),
-            ('LAB TESTS', 2500),
-            ('NHIF CONTRIBUTION', 1500)
-        ],
-        'Airtime': [
-            ('SAFARICOM AIRTIME', 500),
-            ('DATA BUNDLE', 1000),
-            ('AIRTEL AIRTIME', 300),
-            ('INTERNET BUNDLE', 1500)
-        ]
-    }
-    
-    if category in ['Utilities', 'Health', 'Airtime']:
-        detail, amount = random.choice(details_map[category])
-    else:
-        time_options = details_map[category].get(time_period, details_map[category]['afternoon'])
-        detail, base_amount = random.choice(time_options)
-        # Add some variation to amounts
-        amount = base_amount + random.randint(-int(base_amount*0.2), int(base_amount*0.3))
-    
-    return detail, max(amount, 50)  # Minimum amount of 50
+@lru_cache(maxsize=1)
+def _cached_df():
+    """Demo transaction data, generated once and shared by all demos"""
+    return create_realistic_transaction_data()
+
+@lru_cache(maxsize=1)
+def _cached_model():
+    """Markov model trained once on the shared demo data"""
+    markov_model = MarkovChainPredictor(order=2)
+    markov_model.train(_cached_df())
+    return markov_model
 
 def demo_markov_training():
     """Demo Markov Chain training process"""
     print("=== DEMO: Markov Chain Training ===\n")
     
     # Create sample data
-    df = create_realistic_transaction_data()
+    df = _cached_df()
     print(f"Created {len(df)} transactions over 6 months")
-    print(f"Categories: {df['Category'].unique()}")
+    print(f"Categories: {df['Category'].unique().tolist()}")
     print(f"Date range: {df['Date'].min()} to {df['Date'].max()}")
     
     # Initialize and train Markov model
-    markov_model = MarkovChainPredictor(order=2)
-    markov_model.train(df)
+    markov_model = _cached_model()
     
     # Show model statistics
     stats = markov_model.get_model_stats()
@@ -225,9 +286,8 @@ def demo_behavior_prediction():
     print("=== DEMO: Behavior Prediction ===\n")
     
     # Create and train model
-    df = create_realistic_transaction_data()
-    markov_model = MarkovChainPredictor(order=2)
-    markov_model.train(df)
+    df = _cached_df()
+    markov_model = _cached_model()
     
     # Get a recent state for prediction
     df_with_states = markov_model.create_states(df)
@@ -251,9 +311,8 @@ def demo_spending_sequences():
     print("=== DEMO: Spending Sequence Prediction ===\n")
     
     # Create and train model
-    df = create_realistic_transaction_data()
-    markov_model = MarkovChainPredictor(order=2)
-    markov_model.train(df)
+    df = _cached_df()
+    markov_model = _cached_model()
     
     # Predict sequences for different starting categories
     categories = ['Food', 'Transport', 'Entertainment']
@@ -277,9 +336,8 @@ def demo_anomaly_detection():
     print("=== DEMO: Anomaly Detection ===\n")
     
     # Create and train model
-    df = create_realistic_transaction_data()
-    markov_model = MarkovChainPredictor(order=2)
-    markov_model.train(df)
+    df = _cached_df()
+    markov_model = _cached_model()
     
     # Detect anomalies
     anomalies = markov_model.detect_anomalies(df, threshold=0.1)
@@ -303,7 +361,7 @@ def demo_behavioral_analysis():
     print("=== DEMO: Comprehensive Behavioral Analysis ===\n")
     
     # Create data and analyzer
-    df = create_realistic_transaction_data()
+    df = _cached_df()
     analyzer = BehaviorAnalyzer()
     
     # Perform analysis
@@ -334,9 +392,8 @@ def demo_monthly_forecasting():
     print("=== DEMO: Monthly Spending Forecasting ===\n")
     
     # Create and train model
-    df = create_realistic_transaction_data()
-    markov_model = MarkovChainPredictor(order=2)
-    markov_model.train(df)
+    df = _cached_df()
+    markov_model = _cached_model()
     
     # Get monthly predictions
     monthly_forecast = markov_model.predict_monthly_spending()
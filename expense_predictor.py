@@ -1,25 +1,54 @@
+import re
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from typing import Dict, List
+from typing import Dict, List, Optional
 import streamlit as st
 
+# Seasonal multipliers per category, keyed by calendar month
+SEASONAL_FACTORS = {
+    'Food': {12: 1.2, 1: 1.1, 4: 1.0, 7: 1.0, 10: 1.0},  # Higher in Dec/Jan
+    'Transport': {12: 1.3, 1: 1.1, 4: 1.0, 7: 1.1, 10: 1.0},  # Higher in holidays
+    'Entertainment': {12: 1.5, 1: 0.8, 4: 1.0, 7: 1.2, 10: 1.0},  # Higher in Dec, July
+    'Shopping': {11: 1.3, 12: 1.4, 1: 0.9, 4: 1.0, 7: 1.1, 10: 1.0},  # Black Friday, Christmas
+    'Utilities': {6: 1.2, 7: 1.3, 8: 1.2, 12: 1.1, 1: 1.1, 2: 1.0}  # Higher in hot/cold months
+}
+
+# Lookup table SEASONAL[category_id, month]; the extra last row serves
+# categories without seasonal data and stays at 1.0
+SEASONAL_CATEGORY_IDS = {category: i for i, category in enumerate(SEASONAL_FACTORS)}
+SEASONAL = np.ones((len(SEASONAL_FACTORS) + 1, 13))
+for _category, _factors in SEASONAL_FACTORS.items():
+    for _month, _factor in _factors.items():
+        SEASONAL[SEASONAL_CATEGORY_IDS[_category], _month] = _factor
+
+# Tags coffee and subscription spending in one scan; each optional lookahead
+# captures independently so a transaction can match both groups
+MICRO_SAVINGS_PATTERN = re.compile(
+    r'^(?:(?=.*?(?P<coffee>coffee|cafe|tea|starbucks)))?'
+    r'(?:(?=.*?(?P<subscription>subscription|netflix|spotify|dstv)))?',
+    re.IGNORECASE | re.DOTALL
+)
+
+
 class ExpensePredictor:
     def __init__(self):
         pass
     
     def predict_monthly_expenses(self, df: pd.DataFrame) -> Dict:
         """Predict next month's expenses based on historical data"""
-        expenses_df = df[df['Amount'] < 0].copy()
-        expenses_df['Amount'] = expenses_df['Amount'].abs()
+        expenses_df = df[df['Amount'] < 0]
         
-        # Group by month and category
+        # Group by month and category; expenses are negative, so negate the sums
         monthly_data = expenses_df.groupby([
             pd.Grouper(key='Date', freq='ME'),
             'Category'
-        ])['Amount'].sum().reset_index()
+        ], observed=True)['Amount'].sum().reset_index()
+        monthly_data['Amount'] = -monthly_data['Amount']
         
-        predictions = {}
+        categories = []
+        next_month_preds = []
+        category_amounts = []
         
         for category in monthly_data['Category'].unique():
             category_data = monthly_data[monthly_data['Category'] == category]
@@ -37,17 +66,27 @@ class ExpensePredictor:
                     # Use average of last 2 months
                     next_month_pred = np.mean(amounts[-2:])
                 
-                # Add seasonal adjustment (simple)
-                current_month = datetime.now().month
-                seasonal_factor = self._get_seasonal_factor(category, current_month)
-                next_month_pred *= seasonal_factor
-                
-                predictions[category] = {
-                    'predicted_amount': max(0, next_month_pred),
-                    'historical_average': np.mean(amounts),
-                    'trend': 'increasing' if len(amounts) >= 2 and amounts[-1] > amounts[-2] else 'stable',
-                    'confidence': min(len(amounts) / 6, 1.0)  # Higher confidence with more data
-                }
+                categories.append(category)
+                next_month_preds.append(next_month_pred)
+                category_amounts.append(amounts)
+        
+        if not categories:
+            return {}
+        
+        # Add seasonal adjustment (simple) for all categories at once
+        current_month = datetime.now().month
+        preds = np.asarray(next_month_preds, dtype=float)
+        preds *= SEASONAL[self._seasonal_ids(categories), current_month]
+        
+        predictions = {}
+        
+        for category, next_month_pred, amounts in zip(categories, preds, category_amounts):
+            predictions[category] = {
+                'predicted_amount': max(0, next_month_pred),
+                'historical_average': np.mean(amounts),
+                'trend': 'increasing' if len(amounts) >= 2 and amounts[-1] > amounts[-2] else 'stable',
+                'confidence': min(len(amounts) / 6, 1.0)  # Higher confidence with more data
+            }
         
         return predictions
     
@@ -87,18 +126,10 @@ class ExpensePredictor:
             'category_predictions': category_predictions
         }
     
-    def _get_seasonal_factor(self, category: str, month: int) -> float:
-        """Apply seasonal adjustments to predictions"""
-        seasonal_factors = {
-            'Food': {12: 1.2, 1: 1.1, 4: 1.0, 7: 1.0, 10: 1.0},  # Higher in Dec/Jan
-            'Transport': {12: 1.3, 1: 1.1, 4: 1.0, 7: 1.1, 10: 1.0},  # Higher in holidays
-            'Entertainment': {12: 1.5, 1: 0.8, 4: 1.0, 7: 1.2, 10: 1.0},  # Higher in Dec, July
-            'Shopping': {11: 1.3, 12: 1.4, 1: 0.9, 4: 1.0, 7: 1.1, 10: 1.0},  # Black Friday, Christmas
-            'Utilities': {6: 1.2, 7: 1.3, 8: 1.2, 12: 1.1, 1: 1.1, 2: 1.0}  # Higher in hot/cold months
-        }
-        
-        factors = seasonal_factors.get(category, {})
-        return factors.get(month, 1.0)
+    def _seasonal_ids(self, categories: List[str]) -> np.ndarray:
+        """Map categories to rows of the SEASONAL lookup table"""
+        default_id = len(SEASONAL_CATEGORY_IDS)
+        return np.array([SEASONAL_CATEGORY_IDS.get(category, default_id) for category in categories])
     
     def set_savings_goals(self, current_expenses: Dict, target_reduction: float = 0.15) -> Dict:
         """Set realistic savings goals based on current spending"""
@@ -128,37 +159,58 @@ class ExpensePredictor:
         
         return goals
     
+    def _current_month_spending(self, df: pd.DataFrame, month_start: pd.Timestamp) -> Optional[pd.Series]:
+        """Sum expenses per category since month_start, or None if there are none"""
+        amounts = df['Amount'].to_numpy(dtype=float)
+        mask = (df['Date'] >= month_start).to_numpy() & (amounts < 0)
+        
+        if not mask.any():
+            return None
+        
+        # Categoricals are already factorized; otherwise factorize the slice
+        category = df['Category']
+        if isinstance(category.dtype, pd.CategoricalDtype):
+            codes, categories = category.cat.codes.to_numpy()[mask], category.cat.categories
+        else:
+            codes, categories = pd.factorize(category.to_numpy()[mask])
+        
+        valid = codes >= 0
+        sums = np.bincount(codes[valid], weights=-amounts[mask][valid], minlength=len(categories))
+        return pd.Series(sums, index=categories)
+    
     def track_goal_progress(self, df: pd.DataFrame, goals: Dict) -> Dict:
         """Track progress towards savings goals"""
-        current_month_expenses = df[
-            (df['Date'] >= pd.Timestamp.now().replace(day=1)) &
-            (df['Amount'] < 0)
-        ].copy()
+        now = pd.Timestamp.now()
+        current_month_start = now.normalize().replace(day=1)
+        current_spending = self._current_month_spending(df, current_month_start)
         
-        if current_month_expenses.empty:
+        if current_spending is None:
             return {}
         
-        current_month_expenses['Amount'] = current_month_expenses['Amount'].abs()
-        current_spending = current_month_expenses.groupby('Category')['Amount'].sum()
+        categories = list(goals)
+        targets = np.array([goals[category]['target_monthly'] for category in categories], dtype=float)
+        current = current_spending.reindex(categories, fill_value=0).to_numpy(dtype=float)
         
-        progress = {}
+        # Share of the target still unspent; a zero target is met only by zero spending
+        safe_targets = np.where(targets > 0, targets, 1)
+        progress_percentage = np.where(
+            targets > 0,
+            np.clip((targets - current) / safe_targets * 100, 0, 100),
+            np.where(current == 0, 100, 0)
+        )
+        on_track = current <= targets
+        days_remaining = now.days_in_month - now.day
         
-        for category, goal_data in goals.items():
-            current_amount = current_spending.get(category, 0)
-            target_amount = goal_data['target_monthly']
-            
-            if target_amount > 0:
-                progress_percentage = min(100, (target_amount - current_amount) / target_amount * 100)
-            else:
-                progress_percentage = 100 if current_amount == 0 else 0
-            
-            progress[category] = {
-                'current_spending': current_amount,
-                'target_spending': target_amount,
-                'progress_percentage': max(0, progress_percentage),
-                'on_track': current_amount <= target_amount,
-                'days_remaining': (pd.Timestamp.now().replace(day=1) + pd.DateOffset(months=1) - pd.Timestamp.now()).days
+        progress = {
+            category: {
+                'current_spending': current[i],
+                'target_spending': goals[category]['target_monthly'],
+                'progress_percentage': progress_percentage[i],
+                'on_track': bool(on_track[i]),
+                'days_remaining': days_remaining
             }
+            for i, category in enumerate(categories)
+        }
         
         return progress
     
@@ -167,20 +219,15 @@ class ExpensePredictor:
         alerts = []
         
         # Current month spending
-        current_month_start = pd.Timestamp.now().replace(day=1)
-        current_month_expenses = df[
-            (df['Date'] >= current_month_start) &
-            (df['Amount'] < 0)
-        ].copy()
+        now = pd.Timestamp.now()
+        current_month_start = now.normalize().replace(day=1)
+        current_spending = self._current_month_spending(df, current_month_start)
         
-        if current_month_expenses.empty:
+        if current_spending is None:
             return alerts
         
-        current_month_expenses['Amount'] = current_month_expenses['Amount'].abs()
-        current_spending = current_month_expenses.groupby('Category')['Amount'].sum()
-        
-        days_passed = (pd.Timestamp.now() - current_month_start).days
-        days_in_month = pd.Timestamp.now().days_in_month
+        days_passed = (now - current_month_start).days
+        days_in_month = now.days_in_month
         month_progress = days_passed / days_in_month
         
         for category, goal_data in goals.items():
@@ -207,17 +254,19 @@ class ExpensePredictor:
     
     def suggest_micro_savings(self, df: pd.DataFrame) -> List[Dict]:
         """Suggest small daily changes that add up to significant savings"""
-        expenses_df = df[df['Amount'] < 0].copy()
-        expenses_df['Amount'] = expenses_df['Amount'].abs()
+        amounts = df['Amount'].to_numpy()
+        expense_mask = amounts < 0
+        # Expenses are negative, so negation gives their absolute amounts
+        amounts_abs = -amounts[expense_mask]
         
         suggestions = []
         
+        matches = df['Details'][expense_mask].str.extract(MICRO_SAVINGS_PATTERN)
+        
         # Daily coffee/tea expenses
-        coffee_transactions = expenses_df[
-            expenses_df['Details'].str.contains('coffee|cafe|tea|starbucks', case=False, na=False)
-        ]
-        if not coffee_transactions.empty:
-            daily_coffee_cost = coffee_transactions['Amount'].mean()
+        coffee_amounts = amounts_abs[matches['coffee'].notna().to_numpy()]
+        if coffee_amounts.size:
+            daily_coffee_cost = coffee_amounts.mean()
             monthly_savings = daily_coffee_cost * 20 * 0.5  # Save 50% by making coffee at home
             suggestions.append({
                 'category': 'Food',
@@ -228,9 +277,9 @@ class ExpensePredictor:
             })
         
         # Transport optimization
-        transport_expenses = expenses_df[expenses_df['Category'] == 'Transport']
-        if not transport_expenses.empty:
-            avg_transport_cost = transport_expenses['Amount'].mean()
+        transport_amounts = amounts_abs[df['Category'].to_numpy()[expense_mask] == 'Transport']
+        if transport_amounts.size:
+            avg_transport_cost = transport_amounts.mean()
             suggestions.append({
                 'category': 'Transport',
                 'suggestion': f"Walk or cycle for short distances. Average trip cost: KSh {avg_transport_cost:.2f}",
@@ -240,11 +289,9 @@ class ExpensePredictor:
             })
         
         # Subscription services
-        recurring_payments = expenses_df[
-            expenses_df['Details'].str.contains('subscription|netflix|spotify|dstv', case=False, na=False)
-        ]
-        if not recurring_payments.empty:
-            monthly_subscriptions = recurring_payments['Amount'].sum()
+        subscription_amounts = amounts_abs[matches['subscription'].notna().to_numpy()]
+        if subscription_amounts.size:
+            monthly_subscriptions = subscription_amounts.sum()
             suggestions.append({
                 'category': 'Entertainment',
                 'suggestion': f"Review and cancel unused subscriptions. Current monthly cost: KSh {monthly_subscriptions:.2f}",
@@ -4,57 +4,325 @@ Handles user feedback collection and donation options (Buy Me a Coffee & M-Pesa)
 """
 
 import streamlit as st
-import json
 import os
-from datetime import datetime
-import requests
-from typing import Dict, List, Optional
+import stat
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, List
+from utils import json_dumps, json_loads
+
+# Buffer size for feedback/config file I/O
+IO_BUFFER_SIZE = 64 * 1024
+
+DEFAULT_DONATION_CONFIG = {
+    "buy_me_coffee_url": "https://buymeacoffee.com/njorogesta0",
+    "mpesa_phone": "0716131888",
+    "project_name": "M-Pesa Statement Analyzer",
+    "github_repo": "https://github.com/mufasa78/mpesa-insights"
+}
+
+def _write_atomic(path: str, data: bytes):
+    """Write data to a uniquely named temp file beside path, then rename it into place"""
+    # Exclusive create under a unique name; a new file gets the usual umask-based mode
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    f = open(tmp, 'xb', buffering=IO_BUFFER_SIZE)
+    try:
+        with f:
+            f.write(data)
+        # Keep an existing file's permissions, as rewriting it in place would
+        try:
+            os.chmod(tmp, stat.S_IMODE(os.stat(path).st_mode))
+        except FileNotFoundError:
+            pass
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+def _write_donation_config(path: str, config: Dict):
+    """Write donation configuration to disk"""
+    _write_atomic(path, json_dumps(config, indent=True))
+
+@st.cache_resource
+def _load_donation_config(path: str) -> Dict:
+    """Load donation configuration once per process, creating the default file if missing"""
+    try:
+        with open(path, 'rb', buffering=IO_BUFFER_SIZE) as f:
+            return json_loads(f.read())
+    except FileNotFoundError:
+        config = dict(DEFAULT_DONATION_CONFIG)
+        _write_donation_config(path, config)
+        return config
+
+# Feedback form option lists
+_FEEDBACK_TYPES = ("General Feedback", "Bug Report", "Feature Request", "User Experience", "Performance Issue")
+_RATINGS = (1, 2, 3, 4, 5)
+_FEATURES = (
+    "PDF Upload & Processing",
+    "Expense Categorization",
+    "Financial Dashboard",
+    "Budget Analysis",
+    "Income Tracking",
+    "Spending Comparisons",
+    "AI Predictions",
+    "Markov Chain Analysis",
+    "Data Export",
+)
+_MOST_VALUABLE_OPTS = ("",) + _FEATURES
+
+# Static Markdown/HTML blocks, formatted with config values at render time
+_BMC_INTRO_MD = """
+**Buy Me a Coffee** ☕
+
+If this app helped you manage your finances better, consider buying me a coffee!
+Your support helps keep this project free and open-source.
+"""
+
+_BMC_BUTTON_HTML = """
+<a href="{url}" target="_blank">
+    <img src="https://cdn.buymeacoffee.com/buttons/v2/default-yellow.png" 
+         alt="Buy Me A Coffee" 
+         style="height: 60px !important;width: 217px !important;" >
+</a>
+"""
+
+_MPESA_INSTRUCTIONS_MD = """
+**M-Pesa Send Money** 💸
+
+• **Phone Number:** `{phone}`
+
+**How to donate via M-Pesa:**
+1. Go to M-Pesa menu → Send Money
+2. Enter Phone Number: `{phone}`
+3. Enter your donation amount
+4. Enter PIN → Send
+
+**Simple and direct!** 🎯
+"""
+
+_IMPACT_COL_1_MD = """
+**KSh 50 - 200** ☕
+
+• Shows appreciation
+• Motivates development
+• Covers basic costs
+"""
+
+_IMPACT_COL_2_MD = """
+**KSh 200 - 1,000** 🚀
+
+• Funds new features
+• Improves performance
+• Better hosting
+"""
+
+_IMPACT_COL_3_MD = """
+**KSh 1,000+** 🌟
+
+• Major feature development
+• Premium infrastructure
+• Dedicated support
+"""
+
+_DONATION_THANKS_MD = """
+🙏 **Thank you for considering a donation!** 
+
+Every contribution, no matter the size, helps keep this project alive and free for everyone. 
+Your support enables continuous improvements and new features that benefit the entire community.
+"""
+
+_GITHUB_PITCH_MD = """
+### 🌟 Star us on GitHub!
+
+This project is **100% open source** and available on GitHub. 
+
+**Why open source?**
+• 🔒 **Transparency**: You can see exactly how your data is processed
+• 🛡️ **Security**: Community-reviewed code you can trust
+• 🤝 **Community**: Contribute features and improvements
+• 📚 **Learning**: Study the code and learn from it
+
+**How you can contribute:**
+• ⭐ Star the repository
+• 🐛 Report bugs and issues
+• 💡 Suggest new features
+• 🔧 Submit pull requests
+• 📖 Improve documentation
+"""
+
+_GITHUB_CARDS_HTML = """
+<div style="text-align: center; padding: 20px;">
+    <a href="{url}" target="_blank" style="text-decoration: none;">
+        <div style="background: #24292e; color: white; padding: 15px; border-radius: 10px; margin: 10px 0;">
+            <h3 style="margin: 0; color: white;">🐙 GitHub</h3>
+            <p style="margin: 5px 0; color: #f6f8fa;">View Source Code</p>
+        </div>
+    </a>
+
+    <a href="{url}/issues" target="_blank" style="text-decoration: none;">
+        <div style="background: #28a745; color: white; padding: 15px; border-radius: 10px; margin: 10px 0;">
+            <h3 style="margin: 0; color: white;">🐛 Issues</h3>
+            <p style="margin: 5px 0; color: white;">Report Bugs</p>
+        </div>
+    </a>
+
+    <a href="{url}/discussions" target="_blank" style="text-decoration: none;">
+        <div style="background: #6f42c1; color: white; padding: 15px; border-radius: 10px; margin: 10px 0;">
+            <h3 style="margin: 0; color: white;">💬 Discuss</h3>
+            <p style="margin: 5px 0; color: white;">Join Community</p>
+        </div>
+    </a>
+</div>
+"""
+
+_DATA_SAFE_MD = """
+**Local Processing Only**
+• Your M-Pesa data never leaves your device
+• All analysis happens in your browser
+• No data is sent to external servers
+• No account registration required
+
+**Open Source Transparency**
+• Full source code available on GitHub
+• Community-reviewed security
+• No hidden data collection
+• You can audit the code yourself
+"""
+
+_WHY_TRUST_MD = """
+**Built for the Community**
+• Created by developers who understand privacy
+• No venture capital or corporate interests
+• Donation-supported, not ad-supported
+• Community-driven development
+
+**Technical Safeguards**
+• Client-side processing only
+• No external API calls for data
+• Secure file handling
+• Regular security updates
+"""
+
+_TRUST_OPEN_SOURCE_MD = """
+**🔓 Open Source**
+
+Complete transparency
+Community oversight
+Auditable code
+"""
+
+_TRUST_LOCAL_MD = """
+**🏠 Local Processing**
+
+Data stays on your device
+No cloud uploads
+Offline capable
+"""
+
+_TRUST_COMMUNITY_MD = """
+**🤝 Community Driven**
+
+User feedback driven
+No corporate agenda
+Donation supported
+"""
+
+_SIDEBAR_BMC_HTML = """
+<div style="text-align: center;">
+    <a href="{url}" target="_blank">
+        <img src="https://cdn.buymeacoffee.com/buttons/v2/default-yellow.png" 
+             alt="Buy Me A Coffee" 
+             style="height: 40px !important;width: 145px !important;" >
+    </a>
+</div>
+"""
+
+_SIDEBAR_MPESA_MD = """
+**M-Pesa Send Money:**
+📱 `{phone}`
+"""
+
+_SIDEBAR_GITHUB_HTML = """
+<div style="text-align: center; margin-top: 10px;">
+    <a href="{url}" target="_blank" style="text-decoration: none;">
+        <div style="background: #24292e; color: white; padding: 10px; border-radius: 5px;">
+            🐙 View on GitHub
+        </div>
+    </a>
+</div>
+"""
+
+@st.cache_data(max_entries=4)
+def _read_feedback(path: str, mtime_ns: int) -> List[Dict]:
+    """Parse the feedback file; mtime_ns keys the cache so edits invalidate it"""
+    try:
+        with open(path, 'rb', buffering=IO_BUFFER_SIZE) as f:
+            return [json_loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        return []
 
 class FeedbackDonationSystem:
+    # Parsed donation config shared by every instance in the process
+    _CONFIG_CACHE = None
+    
     def __init__(self):
-        self.feedback_file = "user_feedback.json"
+        self.feedback_file = "user_feedback.jsonl"
+        self.legacy_feedback_file = "user_feedback.json"
         self.donation_config_file = "donation_config.json"
+        self._next_id = None
         self.load_donation_config()
+        self._migrate_legacy_feedback()
     
     def load_donation_config(self):
         """Load donation configuration"""
-        default_config = {
-            "buy_me_coffee_url": "https://buymeacoffee.com/njorogesta0",
-            "mpesa_phone": "0716131888",
-            "project_name": "M-Pesa Statement Analyzer",
-            "github_repo": "https://github.com/mufasa78/mpesa-insights"
-        }
-        
-        try:
-            with open(self.donation_config_file, 'r') as f:
-                self.donation_config = json.load(f)
-        except FileNotFoundError:
-            self.donation_config = default_config
-            self.save_donation_config()
+        if FeedbackDonationSystem._CONFIG_CACHE is None:
+            FeedbackDonationSystem._CONFIG_CACHE = _load_donation_config(self.donation_config_file)
+        self.donation_config = FeedbackDonationSystem._CONFIG_CACHE
     
     def save_donation_config(self):
         """Save donation configuration"""
-        with open(self.donation_config_file, 'w') as f:
-            json.dump(self.donation_config, f, indent=2)
+        _write_donation_config(self.donation_config_file, self.donation_config)
+        _load_donation_config.clear()
+        FeedbackDonationSystem._CONFIG_CACHE = self.donation_config
+    
+    def _migrate_legacy_feedback(self):
+        """Convert feedback stored as a single JSON array into JSON Lines"""
+        if os.path.exists(self.feedback_file) or not os.path.exists(self.legacy_feedback_file):
+            return
+        
+        with open(self.legacy_feedback_file, 'rb', buffering=IO_BUFFER_SIZE) as f:
+            feedback_list = json_loads(f.read())
+        
+        _write_atomic(self.feedback_file, b''.join(json_dumps(feedback) + b'\n' for feedback in feedback_list))
     
     def load_feedback_data(self) -> List[Dict]:
-        """Load existing feedback data"""
+        """Load existing feedback data (one JSON object per line)"""
         try:
-            with open(self.feedback_file, 'r') as f:
-                return json.load(f)
+            mtime_ns = os.stat(self.feedback_file).st_mtime_ns
         except FileNotFoundError:
             return []
+        return _read_feedback(self.feedback_file, mtime_ns)
     
     def save_feedback(self, feedback_data: Dict):
-        """Save new feedback"""
-        feedback_list = self.load_feedback_data()
+        """Save new feedback by appending a single line"""
+        # Count existing entries once, then hand out ids from memory
+        if self._next_id is None:
+            try:
+                with open(self.feedback_file, 'rb', buffering=IO_BUFFER_SIZE) as f:
+                    self._next_id = sum(1 for line in f if line.strip()) + 1
+            except FileNotFoundError:
+                self._next_id = 1
+        
         feedback_data['timestamp'] = datetime.now().isoformat()
-        feedback_data['id'] = len(feedback_list) + 1
-        feedback_list.append(feedback_data)
+        feedback_data['id'] = self._next_id
+        self._next_id += 1
         
-        with open(self.feedback_file, 'w') as f:
-            json.dump(feedback_list, f, indent=2)
+        with open(self.feedback_file, 'ab', buffering=IO_BUFFER_SIZE) as f:
+            f.write(json_dumps(feedback_data) + b'\n')
+        _read_feedback.clear()
     
+    @st.fragment
     def render_donation_section(self):
         """Render the donation section"""
         st.markdown("---")
@@ -64,22 +332,11 @@ class FeedbackDonationSystem:
         
         with col1:
             st.subheader("🌍 International Donations")
-            st.markdown(f"""
-            **Buy Me a Coffee** ☕
-            
-            If this app helped you manage your finances better, consider buying me a coffee!
-            Your support helps keep this project free and open-source.
-            """)
+            st.markdown(_BMC_INTRO_MD)
             
             # Buy Me a Coffee button
             buy_me_coffee_url = self.donation_config.get("buy_me_coffee_url", "#")
-            st.markdown(f"""
-            <a href="{buy_me_coffee_url}" target="_blank">
-                <img src="https://cdn.buymeacoffee.com/buttons/v2/default-yellow.png" 
-                     alt="Buy Me A Coffee" 
-                     style="height: 60px !important;width: 217px !important;" >
-            </a>
-            """, unsafe_allow_html=True)
+            st.markdown(_BMC_BUTTON_HTML.format(url=buy_me_coffee_url), unsafe_allow_html=True)
             
             st.markdown("**Other Options:**")
             st.markdown("• More donation options coming soon!")
@@ -89,19 +346,7 @@ class FeedbackDonationSystem:
             
             mpesa_phone = self.donation_config.get("mpesa_phone", "0716131888")
             
-            st.markdown(f"""
-            **M-Pesa Send Money** 💸
-            
-            • **Phone Number:** `{mpesa_phone}`
-            
-            **How to donate via M-Pesa:**
-            1. Go to M-Pesa menu → Send Money
-            2. Enter Phone Number: `{mpesa_phone}`
-            3. Enter your donation amount
-            4. Enter PIN → Send
-            
-            **Simple and direct!** 🎯
-            """)
+            st.markdown(_MPESA_INSTRUCTIONS_MD.format(phone=mpesa_phone))
             
             # QR Code placeholder (you can generate actual QR codes)
             st.info("💡 **Tip:** Save these numbers in your M-Pesa contacts for easy future donations!")
@@ -112,40 +357,18 @@ class FeedbackDonationSystem:
         impact_col1, impact_col2, impact_col3 = st.columns(3)
         
         with impact_col1:
-            st.markdown("""
-            **KSh 50 - 200** ☕
-            
-            • Shows appreciation
-            • Motivates development
-            • Covers basic costs
-            """)
+            st.markdown(_IMPACT_COL_1_MD)
         
         with impact_col2:
-            st.markdown("""
-            **KSh 200 - 1,000** 🚀
-            
-            • Funds new features
-            • Improves performance
-            • Better hosting
-            """)
+            st.markdown(_IMPACT_COL_2_MD)
         
         with impact_col3:
-            st.markdown("""
-            **KSh 1,000+** 🌟
-            
-            • Major feature development
-            • Premium infrastructure
-            • Dedicated support
-            """)
+            st.markdown(_IMPACT_COL_3_MD)
         
         # Thank you message
-        st.success("""
-        🙏 **Thank you for considering a donation!** 
-        
-        Every contribution, no matter the size, helps keep this project alive and free for everyone. 
-        Your support enables continuous improvements and new features that benefit the entire community.
-        """)
+        st.success(_DONATION_THANKS_MD)
     
+    @st.fragment
     def render_feedback_form(self, form_key="feedback_form"):
         """Render the feedback collection form"""
         st.header("📝 Share Your Feedback")
@@ -159,13 +382,13 @@ class FeedbackDonationSystem:
             # Feedback type
             feedback_type = st.selectbox(
                 "Feedback Type",
-                ["General Feedback", "Bug Report", "Feature Request", "User Experience", "Performance Issue"]
+                _FEEDBACK_TYPES
             )
             
             # Rating
             rating = st.select_slider(
                 "Overall Rating",
-                options=[1, 2, 3, 4, 5],
+                options=_RATINGS,
                 value=4,
                 format_func=lambda x: "⭐" * x
             )
@@ -188,33 +411,13 @@ class FeedbackDonationSystem:
             st.subheader("📊 Feature Usage")
             features_used = st.multiselect(
                 "Which features have you used?",
-                [
-                    "PDF Upload & Processing",
-                    "Expense Categorization", 
-                    "Financial Dashboard",
-                    "Budget Analysis",
-                    "Income Tracking",
-                    "Spending Comparisons",
-                    "AI Predictions",
-                    "Markov Chain Analysis",
-                    "Data Export"
-                ]
+                _FEATURES
             )
             
             # Most valuable feature
             most_valuable = st.selectbox(
                 "Most Valuable Feature",
-                [""] + [
-                    "PDF Upload & Processing",
-                    "Expense Categorization", 
-                    "Financial Dashboard",
-                    "Budget Analysis",
-                    "Income Tracking",
-                    "Spending Comparisons",
-                    "AI Predictions",
-                    "Markov Chain Analysis",
-                    "Data Export"
-                ]
+                _MOST_VALUABLE_OPTS
             )
             
             # Improvement suggestions
@@ -276,9 +479,25 @@ class FeedbackDonationSystem:
         
         st.subheader("📊 Feedback Statistics")
         
-        # Basic stats
-        total_feedback = len(feedback_data)
-        avg_rating = sum(f.get('rating', 0) for f in feedback_data) / total_feedback if total_feedback > 0 else 0
+        # Aggregate all stats in a single pass over the feedback
+        total_feedback = 0
+        rating_sum = 0
+        recent_feedback = 0
+        rating_counts = Counter()
+        feature_usage = Counter()
+        # ISO timestamps sort lexicographically, so compare against the cutoff date string
+        cutoff_iso = (datetime.now().date() - timedelta(days=7)).isoformat()
+        
+        for f in feedback_data:
+            total_feedback += 1
+            rating = f.get('rating', 0)
+            rating_sum += rating
+            rating_counts[rating] += 1
+            if f.get('timestamp', '') >= cutoff_iso:
+                recent_feedback += 1
+            feature_usage.update(f.get('features_used') or ())
+        
+        avg_rating = rating_sum / total_feedback if total_feedback > 0 else 0
         
         col1, col2, col3 = st.columns(3)
         
@@ -289,36 +508,23 @@ class FeedbackDonationSystem:
             st.metric("Average Rating", f"{avg_rating:.1f} ⭐")
         
         with col3:
-            recent_feedback = len([f for f in feedback_data if 
-                                 datetime.fromisoformat(f['timestamp']).date() >= 
-                                 (datetime.now().date() - timedelta(days=7))])
             st.metric("This Week", recent_feedback)
         
         # Rating distribution
-        rating_counts = {}
-        for f in feedback_data:
-            rating = f.get('rating', 0)
-            rating_counts[rating] = rating_counts.get(rating, 0) + 1
-        
         st.subheader("⭐ Rating Distribution")
-        for rating in sorted(rating_counts.keys(), reverse=True):
+        for rating in range(5, 0, -1):
             count = rating_counts[rating]
-            percentage = (count / total_feedback) * 100
+            percentage = (count / total_feedback) * 100 if total_feedback else 0
             st.write(f"{'⭐' * rating} ({rating}): {count} ({percentage:.1f}%)")
         
         # Feature usage
-        feature_usage = {}
-        for f in feedback_data:
-            for feature in f.get('features_used', []):
-                feature_usage[feature] = feature_usage.get(feature, 0) + 1
-        
         if feature_usage:
             st.subheader("📈 Feature Usage")
-            sorted_features = sorted(feature_usage.items(), key=lambda x: x[1], reverse=True)
-            for feature, count in sorted_features:
+            for feature, count in feature_usage.most_common():
                 percentage = (count / total_feedback) * 100
                 st.write(f"• **{feature}**: {count} users ({percentage:.1f}%)")
     
+    @st.fragment
     def render_github_promotion(self):
         """Render GitHub repository promotion"""
         st.markdown("---")
@@ -329,50 +535,10 @@ class FeedbackDonationSystem:
         col1, col2 = st.columns([2, 1])
         
         with col1:
-            st.markdown(f"""
-            ### 🌟 Star us on GitHub!
-            
-            This project is **100% open source** and available on GitHub. 
-            
-            **Why open source?**
-            • 🔒 **Transparency**: You can see exactly how your data is processed
-            • 🛡️ **Security**: Community-reviewed code you can trust
-            • 🤝 **Community**: Contribute features and improvements
-            • 📚 **Learning**: Study the code and learn from it
-            
-            **How you can contribute:**
-            • ⭐ Star the repository
-            • 🐛 Report bugs and issues
-            • 💡 Suggest new features
-            • 🔧 Submit pull requests
-            • 📖 Improve documentation
-            """)
+            st.markdown(_GITHUB_PITCH_MD)
         
         with col2:
-            st.markdown(f"""
-            <div style="text-align: center; padding: 20px;">
-                <a href="{github_url}" target="_blank" style="text-decoration: none;">
-                    <div style="background: #24292e; color: white; padding: 15px; border-radius: 10px; margin: 10px 0;">
-                        <h3 style="margin: 0; color: white;">🐙 GitHub</h3>
-                        <p style="margin: 5px 0; color: #f6f8fa;">View Source Code</p>
-                    </div>
-                </a>
-                
-                <a href="{github_url}/issues" target="_blank" style="text-decoration: none;">
-                    <div style="background: #28a745; color: white; padding: 15px; border-radius: 10px; margin: 10px 0;">
-                        <h3 style="margin: 0; color: white;">🐛 Issues</h3>
-                        <p style="margin: 5px 0; color: white;">Report Bugs</p>
-                    </div>
-                </a>
-                
-                <a href="{github_url}/discussions" target="_blank" style="text-decoration: none;">
-                    <div style="background: #6f42c1; color: white; padding: 15px; border-radius: 10px; margin: 10px 0;">
-                        <h3 style="margin: 0; color: white;">💬 Discuss</h3>
-                        <p style="margin: 5px 0; color: white;">Join Community</p>
-                    </div>
-                </a>
-            </div>
-            """, unsafe_allow_html=True)
+            st.markdown(_GITHUB_CARDS_HTML.format(url=github_url), unsafe_allow_html=True)
         
         # Community stats (placeholder - you can integrate with GitHub API)
         st.subheader("📊 Community Stats")
@@ -391,6 +557,7 @@ class FeedbackDonationSystem:
         with stats_col4:
             st.metric("👥 Contributors", "1", help="Active contributors")
     
+    @st.fragment
     def render_privacy_trust_section(self):
         """Render privacy and trust information"""
         st.markdown("---")
@@ -400,35 +567,11 @@ class FeedbackDonationSystem:
         
         with col1:
             st.subheader("🛡️ Your Data is Safe")
-            st.markdown("""
-            **Local Processing Only**
-            • Your M-Pesa data never leaves your device
-            • All analysis happens in your browser
-            • No data is sent to external servers
-            • No account registration required
-            
-            **Open Source Transparency**
-            • Full source code available on GitHub
-            • Community-reviewed security
-            • No hidden data collection
-            • You can audit the code yourself
-            """)
+            st.markdown(_DATA_SAFE_MD)
         
         with col2:
             st.subheader("🤝 Why Trust This App?")
-            st.markdown("""
-            **Built for the Community**
-            • Created by developers who understand privacy
-            • No venture capital or corporate interests
-            • Donation-supported, not ad-supported
-            • Community-driven development
-            
-            **Technical Safeguards**
-            • Client-side processing only
-            • No external API calls for data
-            • Secure file handling
-            • Regular security updates
-            """)
+            st.markdown(_WHY_TRUST_MD)
         
         # Trust indicators
         st.subheader("✅ Trust Indicators")
@@ -436,37 +579,20 @@ class FeedbackDonationSystem:
         trust_col1, trust_col2, trust_col3 = st.columns(3)
         
         with trust_col1:
-            st.markdown("""
-            **🔓 Open Source**
-            
-            Complete transparency
-            Community oversight
-            Auditable code
-            """)
+            st.markdown(_TRUST_OPEN_SOURCE_MD)
         
         with trust_col2:
-            st.markdown("""
-            **🏠 Local Processing**
-            
-            Data stays on your device
-            No cloud uploads
-            Offline capable
-            """)
+            st.markdown(_TRUST_LOCAL_MD)
         
         with trust_col3:
-            st.markdown("""
-            **🤝 Community Driven**
-            
-            User feedback driven
-            No corporate agenda
-            Donation supported
-            """)
+            st.markdown(_TRUST_COMMUNITY_MD)
     
     def render_complete_support_section(self):
         """Render the complete support section with feedback, donations, and community"""
         st.title("💝 Support & Community")
         
-        # Create tabs for different sections
+        # Create tabs for different sections; each tab renders as a fragment,
+        # so interacting with one tab reruns only that tab
         support_tab1, support_tab2, support_tab3, support_tab4 = st.tabs([
             "📝 Feedback", "☕ Donate", "🚀 GitHub", "🔒 Privacy"
         ])
@@ -483,47 +609,43 @@ class FeedbackDonationSystem:
         with support_tab4:
             self.render_privacy_trust_section()
     
+    def _sidebar_blocks(self):
+        """Sidebar support blocks, formatted once per session and config"""
+        buy_me_coffee_url = self.donation_config.get("buy_me_coffee_url", "#")
+        mpesa_phone = self.donation_config.get("mpesa_phone", "0716131888")
+        github_url = self.donation_config.get("github_repo", "#")
+        
+        config_key = (buy_me_coffee_url, mpesa_phone, github_url)
+        cached = st.session_state.get("_sidebar_html")
+        if cached is None or cached[0] != config_key:
+            cached = (config_key, (
+                _SIDEBAR_BMC_HTML.format(url=buy_me_coffee_url),
+                _SIDEBAR_MPESA_MD.format(phone=mpesa_phone),
+                _SIDEBAR_GITHUB_HTML.format(url=github_url),
+            ))
+            st.session_state["_sidebar_html"] = cached
+        return cached[1]
+    
     def render_quick_support_sidebar(self):
         """Render a quick support section in the sidebar"""
         with st.sidebar:
             st.markdown("---")
             st.subheader("💝 Support This Project")
             
-            # Quick donation buttons
-            buy_me_coffee_url = self.donation_config.get("buy_me_coffee_url", "#")
+            bmc_html, mpesa_md, github_html = self._sidebar_blocks()
             
-            st.markdown(f"""
-            <div style="text-align: center;">
-                <a href="{buy_me_coffee_url}" target="_blank">
-                    <img src="https://cdn.buymeacoffee.com/buttons/v2/default-yellow.png" 
-                         alt="Buy Me A Coffee" 
-                         style="height: 40px !important;width: 145px !important;" >
-                </a>
-            </div>
-            """, unsafe_allow_html=True)
+            # Quick donation buttons
+            st.markdown(bmc_html, unsafe_allow_html=True)
             
             # M-Pesa quick info
-            mpesa_phone = self.donation_config.get("mpesa_phone", "0716131888")
-            st.markdown(f"""
-            **M-Pesa Send Money:**
-            📱 `{mpesa_phone}`
-            """)
+            st.markdown(mpesa_md)
             
             # Quick feedback
             if st.button("📝 Give Feedback", use_container_width=True):
                 st.session_state.show_feedback = True
             
             # GitHub link
-            github_url = self.donation_config.get("github_repo", "#")
-            st.markdown(f"""
-            <div style="text-align: center; margin-top: 10px;">
-                <a href="{github_url}" target="_blank" style="text-decoration: none;">
-                    <div style="background: #24292e; color: white; padding: 10px; border-radius: 5px;">
-                        🐙 View on GitHub
-                    </div>
-                </a>
-            </div>
-            """, unsafe_allow_html=True)
+            st.markdown(github_html, unsafe_allow_html=True)
             
             st.markdown("---")
             st.caption("🔒 Your data stays private - processed locally only")
@@ -1,8 +1,37 @@
+import re
+from dataclasses import dataclass
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple
 import streamlit as st
+from utils import frame_fingerprint
+
+# Details keywords that mark recurring subscription payments
+SUBSCRIPTION_KEYWORDS = ['subscription', 'monthly', 'annual', 'netflix', 'spotify', 'dstv']
+SUBSCRIPTION_PATTERN = re.compile('|'.join(map(re.escape, SUBSCRIPTION_KEYWORDS)), re.IGNORECASE)
+
+# Grade boundaries: a score at or above HEALTH_GRADE_THRESHOLDS[i] earns HEALTH_GRADES[i + 1]
+HEALTH_GRADE_THRESHOLDS = np.array([0.5, 0.6, 0.7, 0.8, 0.9])
+HEALTH_GRADES = np.array(['F', 'D', 'C', 'B', 'A', 'A+'])
+
+# Dashboard rows as (display name, score key, description)
+DASHBOARD_METRICS = (
+    ('Expense Stability', 'expense_volatility', 'How consistent your monthly expenses are'),
+    ('Savings Rate', 'savings_rate', 'Percentage of income saved'),
+    ('Spending Balance', 'category_balance', 'How balanced your spending is across categories'),
+    ('Spending Trend', 'spending_trend', 'Stability of your spending over time'),
+    ('Emergency Preparedness', 'emergency_fund_ratio', 'Estimated emergency fund coverage'),
+)
+
+@dataclass
+class HealthStats:
+    """Summary statistics every health metric is derived from"""
+    income_total: float
+    expense_total: float  # negative
+    monthly_expenses: pd.Series  # absolute totals per calendar month
+    category_totals: pd.Series  # absolute totals per spending category
+    current_balance: float
 
 class FinancialHealthAnalyzer:
     def __init__(self):
@@ -13,36 +42,47 @@ class FinancialHealthAnalyzer:
             'spending_trend': {'weight': 0.15, 'ideal_range': (-0.05, 0.05)},
             'emergency_fund_ratio': {'weight': 0.15, 'ideal_range': (3, 6)}
         }
+        # Metric order and matching weight vector for the overall score
+        self._metric_order = tuple(self.health_metrics)
+        self._weights = np.array([self.health_metrics[metric]['weight'] for metric in self._metric_order])
     
     def calculate_financial_health_score(self, df: pd.DataFrame) -> Dict:
         """Calculate overall financial health score"""
+        fingerprint = frame_fingerprint(df, ('Date', 'Amount', 'Category', 'Balance'))
+        return self._get_cached_health_score(fingerprint, df)
+    
+    @st.cache_data(show_spinner=False)
+    def _get_cached_health_score(_self, fingerprint: bytes, _df: pd.DataFrame) -> Dict:
+        """Cached health score; the fingerprint stands in for hashing the whole frame"""
+        return _self._calculate_health_score(_df)
+    
+    def _calculate_health_score(self, df: pd.DataFrame) -> Dict:
+        """Score every health metric and combine them"""
         scores = {}
+        stats = self._compute_health_stats(df)
         
         # 1. Expense Volatility (lower is better)
-        volatility_score = self._calculate_expense_volatility(df)
+        volatility_score = self._calculate_expense_volatility(stats)
         scores['expense_volatility'] = volatility_score
         
         # 2. Savings Rate (higher is better)
-        savings_score = self._calculate_savings_rate(df)
+        savings_score = self._calculate_savings_rate(stats)
         scores['savings_rate'] = savings_score
         
         # 3. Category Balance (balanced spending is better)
-        balance_score = self._calculate_category_balance(df)
+        balance_score = self._calculate_category_balance(stats)
         scores['category_balance'] = balance_score
         
         # 4. Spending Trend (stable is better)
-        trend_score = self._calculate_spending_trend(df)
+        trend_score = self._calculate_spending_trend(stats)
         scores['spending_trend'] = trend_score
         
         # 5. Emergency Fund Ratio (estimated)
-        emergency_score = self._estimate_emergency_fund_ratio(df)
+        emergency_score = self._estimate_emergency_fund_ratio(stats)
         scores['emergency_fund_ratio'] = emergency_score
         
         # Calculate weighted overall score
-        overall_score = sum(
-            scores[metric] * self.health_metrics[metric]['weight']
-            for metric in scores
-        )
+        overall_score = float(np.dot(self._weights, [scores[metric] for metric in self._metric_order]))
         
         return {
             'overall_score': overall_score,
@@ -51,15 +91,37 @@ class FinancialHealthAnalyzer:
             'recommendations': self._generate_health_recommendations(scores)
         }
     
-    def _calculate_expense_volatility(self, df: pd.DataFrame) -> float:
-        """Calculate expense volatility (coefficient of variation)"""
-        expenses_df = df[df['Amount'] < 0].copy()
-        expenses_df['Amount'] = expenses_df['Amount'].abs()
+    def _compute_health_stats(self, df: pd.DataFrame) -> HealthStats:
+        """Scan the transactions once for everything the health metrics need"""
+        amounts = df['Amount'].to_numpy(dtype=np.float64)
+        expense_mask = amounts < 0
+        expenses_df = df[expense_mask]
+        
+        income_total = amounts[amounts > 0].sum()
+        expense_total = amounts[expense_mask].sum()
         
         monthly_expenses = expenses_df.groupby(
             pd.Grouper(key='Date', freq='ME')
-        )['Amount'].sum()
+        )['Amount'].sum().abs()
+        category_totals = expenses_df.groupby('Category', sort=False, observed=True)['Amount'].sum().abs()
         
+        # Estimate current balance from last balance in data, else the net flow
+        if 'Balance' in df.columns:
+            current_balance = df['Balance'].to_numpy()[-1] if not df.empty else 0
+        else:
+            current_balance = income_total + expense_total
+        
+        return HealthStats(
+            income_total=income_total,
+            expense_total=expense_total,
+            monthly_expenses=monthly_expenses,
+            category_totals=category_totals,
+            current_balance=current_balance
+        )
+    
+    def _calculate_expense_volatility(self, stats: HealthStats) -> float:
+        """Calculate expense volatility (coefficient of variation)"""
+        monthly_expenses = stats.monthly_expenses
         if len(monthly_expenses) < 2:
             return 0.5  # Neutral score for insufficient data
         
@@ -74,15 +136,13 @@ class FinancialHealthAnalyzer:
         else:
             return 0.0
     
-    def _calculate_savings_rate(self, df: pd.DataFrame) -> float:
+    def _calculate_savings_rate(self, stats: HealthStats) -> float:
         """Calculate estimated savings rate"""
-        income = df[df['Amount'] > 0]['Amount'].sum()
-        expenses = df[df['Amount'] < 0]['Amount'].sum()
-        
+        income = stats.income_total
         if income <= 0:
             return 0.0
         
-        savings_rate = (income + expenses) / income  # expenses are negative
+        savings_rate = (income + stats.expense_total) / income  # expenses are negative
         
         # Convert to score
         ideal_min, ideal_max = self.health_metrics['savings_rate']['ideal_range']
@@ -91,42 +151,36 @@ class FinancialHealthAnalyzer:
         else:
             return savings_rate / ideal_min
     
-    def _calculate_category_balance(self, df: pd.DataFrame) -> float:
+    def _calculate_category_balance(self, stats: HealthStats) -> float:
         """Calculate how balanced spending is across categories"""
-        expenses_df = df[df['Amount'] < 0].copy()
-        expenses_df['Amount'] = expenses_df['Amount'].abs()
-        
-        category_totals = expenses_df.groupby('Category')['Amount'].sum()
+        category_totals = stats.category_totals
         total_expenses = category_totals.sum()
         
         if total_expenses == 0:
             return 0.5
         
         # Calculate entropy (higher entropy = more balanced)
-        proportions = category_totals / total_expenses
-        entropy = -sum(p * np.log(p) for p in proportions if p > 0)
+        proportions = category_totals.to_numpy() / total_expenses
+        proportions = proportions[proportions > 0]
+        entropy = -np.dot(proportions, np.log(proportions))
         max_entropy = np.log(len(category_totals))
         
         balance_score = entropy / max_entropy if max_entropy > 0 else 0
         
         return balance_score
     
-    def _calculate_spending_trend(self, df: pd.DataFrame) -> float:
+    def _calculate_spending_trend(self, stats: HealthStats) -> float:
         """Calculate spending trend (stable is better)"""
-        expenses_df = df[df['Amount'] < 0].copy()
-        expenses_df['Amount'] = expenses_df['Amount'].abs()
-        
-        monthly_expenses = expenses_df.groupby(
-            pd.Grouper(key='Date', freq='ME')
-        )['Amount'].sum()
-        
+        monthly_expenses = stats.monthly_expenses
         if len(monthly_expenses) < 3:
             return 0.5
         
-        # Calculate trend using linear regression
-        x = np.arange(len(monthly_expenses))
-        coeffs = np.polyfit(x, monthly_expenses.values, 1)
-        trend = coeffs[0] / monthly_expenses.mean()  # Normalize by average
+        # Calculate trend using the closed-form least-squares slope
+        y = monthly_expenses.to_numpy(dtype=np.float64)
+        x_centered = np.arange(y.size, dtype=np.float64) - (y.size - 1) / 2.0
+        y_mean = y.mean()
+        slope = np.dot(x_centered, y - y_mean) / np.dot(x_centered, x_centered)
+        trend = slope / y_mean  # Normalize by average
         
         # Convert to score (stable trend = high score)
         ideal_min, ideal_max = self.health_metrics['spending_trend']['ideal_range']
@@ -135,23 +189,15 @@ class FinancialHealthAnalyzer:
         else:
             return max(0.0, 1.0 - abs(trend) * 10)
     
-    def _estimate_emergency_fund_ratio(self, df: pd.DataFrame) -> float:
+    def _estimate_emergency_fund_ratio(self, stats: HealthStats) -> float:
         """Estimate emergency fund ratio based on cash flow"""
         # This is a rough estimate based on available data
-        monthly_expenses = df[df['Amount'] < 0].groupby(
-            pd.Grouper(key='Date', freq='ME')
-        )['Amount'].sum().abs().mean()
+        average_monthly_expenses = stats.monthly_expenses.mean()
         
-        # Estimate current balance from last balance in data
-        if 'Balance' in df.columns:
-            current_balance = df['Balance'].iloc[-1] if not df.empty else 0
-        else:
-            current_balance = df['Amount'].sum()  # Net flow
-        
-        if monthly_expenses <= 0:
+        if average_monthly_expenses <= 0:
             return 0.5
         
-        emergency_ratio = current_balance / monthly_expenses
+        emergency_ratio = stats.current_balance / average_monthly_expenses
         
         # Convert to score
         ideal_min, ideal_max = self.health_metrics['emergency_fund_ratio']['ideal_range']
@@ -160,20 +206,13 @@ class FinancialHealthAnalyzer:
         else:
             return emergency_ratio / ideal_min
     
-    def _get_health_grade(self, score: float) -> str:
-        """Convert score to letter grade"""
-        if score >= 0.9:
-            return 'A+'
-        elif score >= 0.8:
-            return 'A'
-        elif score >= 0.7:
-            return 'B'
-        elif score >= 0.6:
-            return 'C'
-        elif score >= 0.5:
-            return 'D'
-        else:
-            return 'F'
+    def _get_health_grade(self, score):
+        """Convert a score (or an array of scores) to letter grades"""
+        score = np.asarray(score, dtype=np.float64)
+        grade_ids = np.searchsorted(HEALTH_GRADE_THRESHOLDS, score, side='right')
+        grade_ids = np.where(np.isnan(score), 0, grade_ids)  # NaN scores grade as F
+        grades = HEALTH_GRADES[grade_ids]
+        return str(grades) if grades.ndim == 0 else grades
     
     def _generate_health_recommendations(self, scores: Dict) -> List[str]:
         """Generate recommendations based on scores"""
@@ -198,18 +237,31 @@ class FinancialHealthAnalyzer:
     
     def generate_financial_wellness_tips(self, df: pd.DataFrame) -> List[Dict]:
         """Generate personalized financial wellness tips"""
+        fingerprint = frame_fingerprint(df, ('Date', 'Amount', 'Category', 'Details'))
+        return self._get_cached_wellness_tips(fingerprint, df)
+    
+    @st.cache_data(show_spinner=False)
+    def _get_cached_wellness_tips(_self, fingerprint: bytes, _df: pd.DataFrame) -> List[Dict]:
+        """Cached wellness tips, so reruns skip the Details keyword scan"""
+        return _self._build_wellness_tips(_df)
+    
+    def _build_wellness_tips(self, df: pd.DataFrame) -> List[Dict]:
+        """Build the wellness tips from the transactions"""
         tips = []
         
-        expenses_df = df[df['Amount'] < 0].copy()
-        expenses_df['Amount'] = expenses_df['Amount'].abs()
+        # Expense rows keep their negative amounts; totals are made absolute after reducing
+        amounts = df['Amount'].to_numpy()
+        expense_mask = amounts < 0
+        expenses_df = df[expense_mask]
         
         # Tip 1: 50/30/20 Rule Analysis
-        total_expenses = expenses_df['Amount'].sum()
+        category_totals = expenses_df.groupby('Category', sort=False, observed=True, dropna=False)['Amount'].sum().abs()
+        total_expenses = category_totals.sum()
         needs_categories = ['Food', 'Utilities', 'Transport', 'Health']
         wants_categories = ['Entertainment', 'Shopping']
         
-        needs_spending = expenses_df[expenses_df['Category'].isin(needs_categories)]['Amount'].sum()
-        wants_spending = expenses_df[expenses_df['Category'].isin(wants_categories)]['Amount'].sum()
+        needs_spending = category_totals.reindex(needs_categories, fill_value=0).sum()
+        wants_spending = category_totals.reindex(wants_categories, fill_value=0).sum()
         
         needs_percentage = (needs_spending / total_expenses * 100) if total_expenses > 0 else 0
         wants_percentage = (wants_spending / total_expenses * 100) if total_expenses > 0 else 0
@@ -222,13 +274,12 @@ class FinancialHealthAnalyzer:
         })
         
         # Tip 2: Subscription Audit
-        recurring_keywords = ['subscription', 'monthly', 'annual', 'netflix', 'spotify', 'dstv']
         subscriptions = expenses_df[
-            expenses_df['Details'].str.contains('|'.join(recurring_keywords), case=False, na=False)
+            expenses_df['Details'].str.contains(SUBSCRIPTION_PATTERN, na=False)
         ]
         
         if not subscriptions.empty:
-            subscription_cost = subscriptions['Amount'].sum()
+            subscription_cost = abs(subscriptions['Amount'].sum())
             tips.append({
                 'title': 'Subscription Audit',
                 'description': f"You spend KSh {subscription_cost:,.2f} on subscriptions",
@@ -237,13 +288,12 @@ class FinancialHealthAnalyzer:
             })
         
         # Tip 3: Cash Flow Timing
-        df_with_day = df.copy()
-        df_with_day['Day'] = df_with_day['Date'].dt.day
-        
-        spending_by_day = df_with_day[df_with_day['Amount'] < 0].groupby('Day')['Amount'].sum().abs()
-        
-        if not spending_by_day.empty:
-            peak_spending_day = spending_by_day.idxmax()
+        # Undated expenses have no day of month, so they sit out as in a groupby
+        dated_expenses = expense_mask & df['Date'].notna().to_numpy()
+        if dated_expenses.any():
+            days = df['Date'].dt.day.to_numpy()[dated_expenses].astype(np.int64)
+            spending_by_day = np.bincount(days, weights=-amounts[dated_expenses], minlength=32)
+            peak_spending_day = spending_by_day.argmax()
             tips.append({
                 'title': 'Spending Pattern Insight',
                 'description': f"You tend to spend most on day {peak_spending_day} of the month",
@@ -262,35 +312,12 @@ class FinancialHealthAnalyzer:
             'grade': health_data['grade'],
             'metrics': [
                 {
-                    'name': 'Expense Stability',
-                    'score': scores['expense_volatility'],
-                    'description': 'How consistent your monthly expenses are',
-                    'status': 'Good' if scores['expense_volatility'] > 0.7 else 'Needs Improvement'
-                },
-                {
-                    'name': 'Savings Rate',
-                    'score': scores['savings_rate'],
-                    'description': 'Percentage of income saved',
-                    'status': 'Good' if scores['savings_rate'] > 0.7 else 'Needs Improvement'
-                },
-                {
-                    'name': 'Spending Balance',
-                    'score': scores['category_balance'],
-                    'description': 'How balanced your spending is across categories',
-                    'status': 'Good' if scores['category_balance'] > 0.7 else 'Needs Improvement'
-                },
-                {
-                    'name': 'Spending Trend',
-                    'score': scores['spending_trend'],
-                    'description': 'Stability of your spending over time',
-                    'status': 'Good' if scores['spending_trend'] > 0.7 else 'Needs Improvement'
-                },
-                {
-                    'name': 'Emergency Preparedness',
-                    'score': scores['emergency_fund_ratio'],
-                    'description': 'Estimated emergency fund coverage',
-                    'status': 'Good' if scores['emergency_fund_ratio'] > 0.7 else 'Needs Improvement'
+                    'name': name,
+                    'score': scores[metric],
+                    'description': description,
+                    'status': 'Good' if scores[metric] > 0.7 else 'Needs Improvement'
                 }
+                for name, metric, description in DASHBOARD_METRICS
             ]
         }
         
@@ -1,8 +1,16 @@
 import streamlit as st
 import pandas as pd
-import json
 from typing import Dict, List
 from categorizer import ExpenseCategorizer
+from utils import json_dumps, json_loads
+
+# Number of suggested transactions shown per income type at a time
+SUGGESTIONS_PAGE_SIZE = 10
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _suggest_income_sources(_categorizer: ExpenseCategorizer, df: pd.DataFrame) -> Dict[str, List[str]]:
+    """Income source suggestions; they depend only on the transactions, so reruns reuse them"""
+    return _categorizer.suggest_income_sources_from_data(df)
 
 class IncomeSourceManager:
     def __init__(self):
@@ -74,7 +82,7 @@ class IncomeSourceManager:
         st.write("**💡 Smart Suggestions**")
         st.write("Based on your transaction history, these might be income sources:")
         
-        suggestions = categorizer.suggest_income_sources_from_data(df)
+        suggestions = _suggest_income_sources(categorizer, df[['Date', 'Details', 'Amount']])
         
         if not suggestions:
             st.info("No recurring income patterns detected. Add your income sources manually above.")
@@ -82,7 +90,13 @@ class IncomeSourceManager:
         
         for income_type, transactions in suggestions.items():
             with st.expander(f"Suggested {income_type} ({len(transactions)} transactions)"):
-                for transaction in transactions:
+                # Only the current page of suggestions gets widgets
+                page_key = f"suggestion_page_{income_type}"
+                num_pages = -(-len(transactions) // SUGGESTIONS_PAGE_SIZE)
+                page = min(st.session_state.get(page_key, 0), num_pages - 1)
+                start = page * SUGGESTIONS_PAGE_SIZE
+                
+                for transaction in transactions[start:start + SUGGESTIONS_PAGE_SIZE]:
                     col1, col2, col3 = st.columns([3, 1, 1])
                     
                     with col1:
@@ -100,6 +114,19 @@ class IncomeSourceManager:
                             categorizer.add_custom_mapping(transaction, 'Other')
                             st.info("Transaction ignored")
                             st.rerun()
+                
+                if num_pages > 1:
+                    prev_col, page_col, next_col = st.columns([1, 2, 1])
+                    with prev_col:
+                        if st.button("◀ Previous", key=f"prev_{page_key}", disabled=page == 0):
+                            st.session_state[page_key] = page - 1
+                            st.rerun()
+                    with page_col:
+                        st.caption(f"Page {page + 1} of {num_pages}")
+                    with next_col:
+                        if st.button("Next ▶", key=f"next_{page_key}", disabled=page >= num_pages - 1):
+                            st.session_state[page_key] = page + 1
+                            st.rerun()
     
     def render_income_analysis_with_sources(self, df: pd.DataFrame, categorizer: ExpenseCategorizer):
         """Render enhanced income analysis with source breakdown"""
@@ -122,6 +149,9 @@ class IncomeSourceManager:
         # Ensure positive amounts
         income_df['Amount'] = income_df['Amount'].abs()
         
+        # Monthly totals feed both the average metric and the insights
+        monthly_income = income_df.groupby(pd.Grouper(key='Date', freq='ME'))['Amount'].sum()
+        
         # Overall income metrics
         col1, col2, col3, col4 = st.columns(4)
         
@@ -130,9 +160,7 @@ class IncomeSourceManager:
             st.metric("Total Income", f"KSh {total_income:,.0f}")
         
         with col2:
-            monthly_avg = income_df.groupby(
-                pd.Grouper(key='Date', freq='ME')
-            )['Amount'].sum().mean()
+            monthly_avg = monthly_income.mean()
             st.metric("Monthly Average", f"KSh {monthly_avg:,.0f}")
         
         with col3:
@@ -187,9 +215,9 @@ class IncomeSourceManager:
         st.dataframe(recent_income, use_container_width=True)
         
         # Income insights
-        self._render_income_insights(income_df, source_summary)
+        self._render_income_insights(monthly_income, source_summary)
     
-    def _render_income_insights(self, income_df: pd.DataFrame, source_summary: pd.DataFrame):
+    def _render_income_insights(self, monthly_income: pd.Series, source_summary: pd.DataFrame):
         """Render income insights and recommendations"""
         st.subheader("💡 Income Insights")
         
@@ -202,19 +230,19 @@ class IncomeSourceManager:
         elif num_sources >= 3:
             insights.append("✅ **Good Diversification**: You have multiple income sources, which provides financial stability.")
         
-        # Regularity insight
-        monthly_income = income_df.groupby(pd.Grouper(key='Date', freq='ME'))['Amount'].sum()
-        if len(monthly_income) >= 2:
-            cv = monthly_income.std() / monthly_income.mean()
+        # Regularity insight (on the raw monthly totals; std uses ddof=1 as pandas did)
+        monthly = monthly_income.to_numpy(dtype=float)
+        if monthly.size >= 2:
+            cv = monthly.std(ddof=1) / monthly.mean()
             if cv < 0.2:
                 insights.append("✅ **Stable Income**: Your income is consistent month-to-month.")
             else:
                 insights.append("⚠️ **Variable Income**: Your income fluctuates significantly. Consider building a larger emergency fund.")
         
         # Growth insight
-        if len(monthly_income) >= 3:
-            recent_avg = monthly_income.tail(3).mean()
-            earlier_avg = monthly_income.head(3).mean()
+        if monthly.size >= 3:
+            recent_avg = monthly[-3:].mean()
+            earlier_avg = monthly[:3].mean()
             growth = (recent_avg - earlier_avg) / earlier_avg * 100
             
             if growth > 10:
@@ -241,16 +269,16 @@ class IncomeSourceManager:
             'custom_mappings': categorizer.custom_mappings
         }
         
-        with open(filename, 'w') as f:
-            json.dump(config, f, indent=2)
+        with open(filename, 'wb') as f:
+            f.write(json_dumps(config, indent=True))
         
         return filename
     
     def load_income_config(self, filename: str = "income_config.json") -> Dict:
         """Load income source configuration from file"""
         try:
-            with open(filename, 'r') as f:
-                config = json.load(f)
+            with open(filename, 'rb') as f:
+                config = json_loads(f.read())
             return config
         except FileNotFoundError:
             return {'income_sources': {}, 'custom_mappings': {}}
\ No newline at end of file
@@ -1,8 +1,86 @@
+import re
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
+from types import MappingProxyType
 from typing import Dict, List, Tuple
 import streamlit as st
+from utils import frame_fingerprint
+
+# Details keywords for each inferred income source, checked in priority order
+INCOME_SOURCE_KEYWORDS = [
+    ('Salary', 'salary|wage|payroll'),
+    ('Business Income', 'business|sales|revenue'),
+    ('Freelance/Consulting', 'freelance|consulting|contract'),
+    ('Investment Returns', 'dividend|interest|investment'),
+    ('Rental Income', 'rent|rental'),
+    ('Gifts/Transfers', 'received from|transfer from'),
+    ('Refunds', 'refund|return'),
+]
+
+# Tests every source in one scan; group s<i> captures when source i matches,
+# each in its own optional lookahead so all matching sources are reported
+INCOME_SOURCE_PATTERN = re.compile(
+    '^' + ''.join(
+        rf'(?:(?=.*?(?P<s{i}>{keywords})))?'
+        for i, (_, keywords) in enumerate(INCOME_SOURCE_KEYWORDS)
+    ),
+    re.IGNORECASE | re.DOTALL
+)
+
+# Stability levels: a CV at or above STABILITY_CV_THRESHOLDS[i] falls to STABILITY_LEVELS[i + 1]
+STABILITY_CV_THRESHOLDS = np.array([0.1, 0.2, 0.4, 0.6])
+STABILITY_LEVELS = (
+    (1.0, 'Very Stable'),
+    (0.8, 'Stable'),
+    (0.6, 'Moderately Stable'),
+    (0.4, 'Somewhat Unstable'),
+    (0.2, 'Unstable'),
+)
+
+# Trend labels: a monthly percentage change above TREND_THRESHOLDS[i] earns TREND_LABELS[i + 1]
+TREND_THRESHOLDS = np.array([-5, -2, 2, 5])
+TREND_LABELS = ('Strong Decline', 'Declining', 'Stable', 'Growing', 'Strong Growth')
+
+# (predicate on the income analysis, suggestion) pairs, in display order; the
+# shared suggestions are read-only and callers get their own dict copies
+INCOME_SUGGESTION_RULES = tuple(
+    (applies, MappingProxyType(suggestion))
+    for applies, suggestion in [
+        # Low income suggestions
+        (lambda analysis: analysis['monthly_average'] < 50000, {
+            'category': 'Income Growth',
+            'suggestion': 'Consider upskilling or certification in high-demand areas like tech, digital marketing, or finance',
+            'potential_impact': 'Could increase income by 30-50%',
+            'effort': 'High',
+            'timeframe': '6-12 months'
+        }),
+        # Single income source
+        (lambda analysis: len(analysis['income_sources']) <= 1, {
+            'category': 'Income Diversification',
+            'suggestion': 'Start a side hustle like online tutoring, freelance writing, or small business',
+            'potential_impact': 'Additional KSh 10,000-30,000/month',
+            'effort': 'Medium',
+            'timeframe': '2-6 months'
+        }),
+        # Unstable income
+        (lambda analysis: analysis['income_stability']['score'] < 0.6, {
+            'category': 'Income Stability',
+            'suggestion': 'Look for more stable employment or create recurring revenue streams',
+            'potential_impact': 'More predictable monthly income',
+            'effort': 'High',
+            'timeframe': '3-12 months'
+        }),
+        # Investment opportunities
+        (lambda analysis: analysis['monthly_average'] > 30000, {
+            'category': 'Passive Income',
+            'suggestion': 'Consider investing in money market funds, SACCOs, or dividend-paying stocks',
+            'potential_impact': '8-15% annual returns',
+            'effort': 'Low',
+            'timeframe': '1-3 months to start'
+        }),
+    ]
+)
 
 class IncomeTracker:
     def __init__(self):
@@ -20,12 +98,20 @@ class IncomeTracker:
     
     def analyze_income_patterns(self, df: pd.DataFrame) -> Dict:
         """Analyze income patterns and provide insights"""
+        fingerprint = frame_fingerprint(df, ('Date', 'Amount', 'Category', 'Details', 'Income_Category'))
+        return self._get_cached_income_analysis(fingerprint, df)
+    
+    @st.cache_data(show_spinner=False)
+    def _get_cached_income_analysis(_self, fingerprint: bytes, _df: pd.DataFrame) -> Dict:
+        """Cached income analysis; the fingerprint stands in for hashing the whole frame"""
+        return _self._analyze_income_patterns(_df)
+    
+    def _analyze_income_patterns(self, df: pd.DataFrame) -> Dict:
+        """Build the income analysis for the given transactions"""
         # Get income transactions (positive amounts or categorized as Income)
-        income_df = df[
-            (df['Amount'] > 0) | (df['Category'] == 'Income')
-        ].copy()
+        income_mask = ((df['Amount'] > 0) | (df['Category'] == 'Income')).to_numpy()
         
-        if income_df.empty:
+        if not income_mask.any():
             return {
                 'total_income': 0,
                 'monthly_average': 0,
@@ -34,171 +120,177 @@ class IncomeTracker:
                 'recommendations': ['No income transactions detected. Please categorize your income transactions.']
             }
         
-        # Ensure positive amounts for income
-        income_df['Amount'] = income_df['Amount'].abs()
+        # Ensure positive amounts for income; only the needed columns are sliced
+        income_amounts = df['Amount'][income_mask].abs()
+        income_values = income_amounts.to_numpy(dtype=np.float64)
         
         # Monthly income analysis
-        monthly_income = income_df.groupby(
-            pd.Grouper(key='Date', freq='ME')
-        )['Amount'].sum()
+        monthly_income = self._monthly_totals(df['Date'].to_numpy(dtype='datetime64[ns]')[income_mask], income_values)
         
         # Income by source/category
-        if 'Income_Category' in income_df.columns:
-            income_sources = income_df.groupby('Income_Category')['Amount'].sum().to_dict()
+        if 'Income_Category' in df.columns:
+            income_sources = income_amounts.groupby(df['Income_Category'][income_mask]).sum().to_dict()
         else:
             # Try to infer from transaction details
-            income_sources = self._infer_income_sources(income_df)
+            income_sources = self._infer_income_sources(df['Details'][income_mask], income_amounts)
         
         # Calculate stability metrics
-        stability_score = self._calculate_income_stability(monthly_income)
+        monthly_stats = self._monthly_income_stats(monthly_income)
+        stability_score = self._calculate_income_stability(monthly_stats)
         
         analysis = {
-            'total_income': income_df['Amount'].sum(),
-            'monthly_average': monthly_income.mean() if len(monthly_income) > 0 else 0,
-            'monthly_income': monthly_income.to_dict(),
+            'total_income': np.nansum(income_values),
+            'monthly_average': monthly_stats['mean'],
+            'monthly_income_dates': monthly_income.index.to_numpy(),
+            'monthly_income_values': monthly_stats['values'],
             'income_sources': income_sources,
             'income_stability': stability_score,
-            'growth_trend': self._calculate_income_trend(monthly_income),
-            'recommendations': self._generate_income_recommendations(income_df, monthly_income)
+            'growth_trend': self._calculate_income_trend(monthly_stats),
+            'recommendations': self._generate_income_recommendations(monthly_stats, income_sources)
         }
         
         return analysis
     
-    def _infer_income_sources(self, income_df: pd.DataFrame) -> Dict:
+    def _monthly_totals(self, dates: np.ndarray, amounts: np.ndarray) -> pd.Series:
+        """Calendar-month totals indexed by month end, with empty months inside the span as zero"""
+        dated = ~np.isnat(dates)
+        months = dates[dated].astype('datetime64[M]').astype(np.int64)
+        if months.size == 0:
+            return pd.Series(dtype=np.float64, index=pd.DatetimeIndex([]))
+        
+        # Bucket on integer month numbers; missing amounts add nothing, as in a sum
+        first_month = months.min()
+        amounts = amounts[dated]
+        if months.max() == first_month:
+            # Single-month input (e.g. a "this month" view): one total, no bucketing
+            totals = np.array([np.nansum(amounts)])
+        else:
+            totals = np.bincount(months - first_month, weights=np.where(np.isnan(amounts), 0, amounts))
+        month_ends = (
+            np.arange(first_month + 1, first_month + totals.size + 1).astype('datetime64[M]').astype('datetime64[ns]')
+            - np.timedelta64(1, 'D')
+        )
+        return pd.Series(totals, index=pd.DatetimeIndex(month_ends))
+    
+    def _infer_income_sources(self, details: pd.Series, amounts: pd.Series) -> Dict:
         """Infer income sources from transaction details"""
-        sources = {}
-        
-        for _, transaction in income_df.iterrows():
-            details = str(transaction['Details']).lower()
-            amount = transaction['Amount']
-            
-            # Pattern matching for income sources
-            if any(word in details for word in ['salary', 'wage', 'payroll']):
-                sources['Salary'] = sources.get('Salary', 0) + amount
-            elif any(word in details for word in ['business', 'sales', 'revenue']):
-                sources['Business Income'] = sources.get('Business Income', 0) + amount
-            elif any(word in details for word in ['freelance', 'consulting', 'contract']):
-                sources['Freelance/Consulting'] = sources.get('Freelance/Consulting', 0) + amount
-            elif any(word in details for word in ['dividend', 'interest', 'investment']):
-                sources['Investment Returns'] = sources.get('Investment Returns', 0) + amount
-            elif any(word in details for word in ['rent', 'rental']):
-                sources['Rental Income'] = sources.get('Rental Income', 0) + amount
-            elif any(word in details for word in ['received from', 'transfer from']):
-                sources['Gifts/Transfers'] = sources.get('Gifts/Transfers', 0) + amount
-            elif any(word in details for word in ['refund', 'return']):
-                sources['Refunds'] = sources.get('Refunds', 0) + amount
-            else:
-                sources['Other Income'] = sources.get('Other Income', 0) + amount
-        
-        return sources
+        # Classify each distinct description once; statements repeat the same payers
+        detail_codes, unique_details = pd.factorize(details.astype(str))
+        
+        # Label each description with the first matching source, in priority order;
+        # labels are integer codes into the known income categories
+        categories = list(self.income_categories)
+        source_codes = np.array(
+            [categories.index(source) for source, _ in INCOME_SOURCE_KEYWORDS] + [categories.index('Other Income')],
+            dtype=np.int8
+        )
+        matches = pd.Series(unique_details).str.extract(INCOME_SOURCE_PATTERN).notna().to_numpy()
+        first_match = np.where(matches.any(axis=1), matches.argmax(axis=1), len(INCOME_SOURCE_KEYWORDS))
+        codes = source_codes[first_match][detail_codes]
+        
+        labels = pd.Categorical.from_codes(codes, categories=categories)
+        return amounts.groupby(labels, observed=True, sort=False).sum().to_dict()
+    
+    def _monthly_income_stats(self, monthly_income: pd.Series) -> Dict:
+        """Statistics of the monthly totals shared by stability, trend and recommendations"""
+        values = monthly_income.to_numpy(dtype=np.float64)
+        return {
+            'values': values,
+            'mean': values.mean() if values.size > 0 else 0,
+            'cv': self._coefficient_of_variation(values) if values.size >= 2 else None,
+            'earlier_avg': values[:3].mean() if values.size >= 3 else None,
+            'recent_avg': values[-3:].mean() if values.size >= 3 else None
+        }
     
-    def _calculate_income_stability(self, monthly_income: pd.Series) -> Dict:
+    def _calculate_income_stability(self, monthly_stats: Dict) -> Dict:
         """Calculate income stability metrics"""
-        if len(monthly_income) < 2:
+        if monthly_stats['cv'] is None:
             return {
                 'score': 0.5,
                 'description': 'Insufficient data',
                 'coefficient_of_variation': 0
             }
         
-        mean_income = monthly_income.mean()
-        std_income = monthly_income.std()
-        cv = std_income / mean_income if mean_income > 0 else float('inf')
+        cv = monthly_stats['cv']
         
-        # Stability score (lower CV = higher stability)
-        if cv < 0.1:
-            stability = {'score': 1.0, 'description': 'Very Stable'}
-        elif cv < 0.2:
-            stability = {'score': 0.8, 'description': 'Stable'}
-        elif cv < 0.4:
-            stability = {'score': 0.6, 'description': 'Moderately Stable'}
-        elif cv < 0.6:
-            stability = {'score': 0.4, 'description': 'Somewhat Unstable'}
-        else:
-            stability = {'score': 0.2, 'description': 'Unstable'}
+        # Stability score (lower CV = higher stability); a NaN CV sorts last, as Unstable
+        score, description = STABILITY_LEVELS[np.searchsorted(STABILITY_CV_THRESHOLDS, cv, side='right')]
         
-        stability['coefficient_of_variation'] = cv
-        return stability
+        return {'score': score, 'description': description, 'coefficient_of_variation': cv}
+    
+    def _coefficient_of_variation(self, values: np.ndarray) -> float:
+        """Sample std over mean of the monthly totals; infinite when the mean is not positive"""
+        mean = values.mean()
+        if not mean > 0:
+            return float('inf')
+        return float(values.std(ddof=1) / mean)
     
-    def _calculate_income_trend(self, monthly_income: pd.Series) -> Dict:
+    def _calculate_income_trend(self, monthly_stats: Dict) -> Dict:
         """Calculate income growth trend"""
-        if len(monthly_income) < 3:
+        y = monthly_stats['values']
+        if y.size < 3:
             return {'trend': 'Insufficient data', 'monthly_change': 0, 'percentage_change': 0}
         
-        # Linear regression to find trend
-        x = np.arange(len(monthly_income))
-        coeffs = np.polyfit(x, monthly_income.values, 1)
-        monthly_change = coeffs[0]
+        # Linear regression to find trend (closed-form least-squares slope)
+        n = y.size
+        avg_income = monthly_stats['mean']
+        x_mean = (n - 1) / 2.0
+        monthly_change = (np.arange(n).dot(y) - n * x_mean * avg_income) / (n * (n * n - 1) / 12.0)
         
         # Percentage change
-        avg_income = monthly_income.mean()
         percentage_change = (monthly_change / avg_income * 100) if avg_income > 0 else 0
         
-        if percentage_change > 5:
-            trend = 'Strong Growth'
-        elif percentage_change > 2:
-            trend = 'Growing'
-        elif percentage_change > -2:
-            trend = 'Stable'
-        elif percentage_change > -5:
-            trend = 'Declining'
-        else:
-            trend = 'Strong Decline'
-        
         return {
-            'trend': trend,
+            'trend': TREND_LABELS[np.searchsorted(TREND_THRESHOLDS, percentage_change, side='left')],
             'monthly_change': monthly_change,
             'percentage_change': percentage_change
         }
     
-    def _generate_income_recommendations(self, income_df: pd.DataFrame, monthly_income: pd.Series) -> List[str]:
+    def _generate_income_recommendations(self, monthly_stats: Dict, income_sources: Dict) -> List[str]:
         """Generate income-related recommendations"""
         recommendations = []
         
         # Income diversification
-        income_sources = self._infer_income_sources(income_df)
         if len(income_sources) == 1:
             recommendations.append("💡 Consider diversifying your income sources to reduce financial risk")
         
-        # Income stability
-        if len(monthly_income) >= 2:
-            cv = monthly_income.std() / monthly_income.mean()
-            if cv > 0.3:
+        # Income stability (an all-zero income has an infinite CV but does not vary)
+        cv = monthly_stats['cv']
+        if cv is not None:
+            if 0.3 < cv < float('inf'):
                 recommendations.append("📊 Your income varies significantly month-to-month. Consider building a larger emergency fund")
         
         # Income growth
-        if len(monthly_income) >= 3:
-            recent_avg = monthly_income.tail(3).mean()
-            earlier_avg = monthly_income.head(3).mean()
-            if recent_avg < earlier_avg * 0.95:
+        if monthly_stats['recent_avg'] is not None:
+            if monthly_stats['recent_avg'] < monthly_stats['earlier_avg'] * 0.95:
                 recommendations.append("📉 Your income has been declining. Consider exploring additional income opportunities")
         
         # Low income warning
-        avg_monthly = monthly_income.mean() if len(monthly_income) > 0 else 0
-        if avg_monthly < 30000:  # Below average Kenyan salary
+        if monthly_stats['mean'] < 30000:  # Below average Kenyan salary
             recommendations.append("💰 Consider ways to increase your income through skills development or side hustles")
         
         return recommendations
     
     def calculate_savings_rate(self, df: pd.DataFrame) -> Dict:
         """Calculate accurate savings rate with proper income tracking"""
-        # Get income and expenses
-        income_df = df[(df['Amount'] > 0) | (df['Category'] == 'Income')].copy()
-        expense_df = df[df['Amount'] < 0].copy()
+        # Get income and expenses (an 'Income' row with a negative amount counts as both)
+        amounts = df['Amount'].to_numpy(dtype=np.float64)
+        income_mask = (amounts > 0) | (df['Category'] == 'Income').to_numpy()
+        expense_mask = amounts < 0
         
-        if income_df.empty:
+        if not income_mask.any():
             return {
                 'savings_rate': 0,
                 'monthly_savings': 0,
                 'status': 'No income data available'
             }
         
-        # Calculate monthly averages
-        income_df['Amount'] = income_df['Amount'].abs()
-        expense_df['Amount'] = expense_df['Amount'].abs()
+        # Calculate monthly averages over the same month buckets as the income analysis
+        dates = df['Date'].to_numpy(dtype='datetime64[ns]')
+        amounts_abs = np.abs(amounts)
         
-        monthly_income = income_df.groupby(pd.Grouper(key='Date', freq='ME'))['Amount'].sum().mean()
-        monthly_expenses = expense_df.groupby(pd.Grouper(key='Date', freq='ME'))['Amount'].sum().mean()
+        monthly_income = self._monthly_totals(dates[income_mask], amounts_abs[income_mask]).mean()
+        monthly_expenses = self._monthly_totals(dates[expense_mask], amounts_abs[expense_mask]).mean()
         
         monthly_savings = monthly_income - monthly_expenses
         savings_rate = (monthly_savings / monthly_income * 100) if monthly_income > 0 else 0
@@ -225,53 +317,7 @@ class IncomeTracker:
     
     def suggest_income_improvements(self, income_analysis: Dict) -> List[Dict]:
         """Suggest ways to improve income"""
-        suggestions = []
-        
-        monthly_avg = income_analysis['monthly_average']
-        stability = income_analysis['income_stability']
-        sources = income_analysis['income_sources']
-        
-        # Low income suggestions
-        if monthly_avg < 50000:
-            suggestions.append({
-                'category': 'Income Growth',
-                'suggestion': 'Consider upskilling or certification in high-demand areas like tech, digital marketing, or finance',
-                'potential_impact': 'Could increase income by 30-50%',
-                'effort': 'High',
-                'timeframe': '6-12 months'
-            })
-        
-        # Single income source
-        if len(sources) <= 1:
-            suggestions.append({
-                'category': 'Income Diversification',
-                'suggestion': 'Start a side hustle like online tutoring, freelance writing, or small business',
-                'potential_impact': 'Additional KSh 10,000-30,000/month',
-                'effort': 'Medium',
-                'timeframe': '2-6 months'
-            })
-        
-        # Unstable income
-        if stability['score'] < 0.6:
-            suggestions.append({
-                'category': 'Income Stability',
-                'suggestion': 'Look for more stable employment or create recurring revenue streams',
-                'potential_impact': 'More predictable monthly income',
-                'effort': 'High',
-                'timeframe': '3-12 months'
-            })
-        
-        # Investment opportunities
-        if monthly_avg > 30000:
-            suggestions.append({
-                'category': 'Passive Income',
-                'suggestion': 'Consider investing in money market funds, SACCOs, or dividend-paying stocks',
-                'potential_impact': '8-15% annual returns',
-                'effort': 'Low',
-                'timeframe': '1-3 months to start'
-            })
-        
-        return suggestions
+        return [dict(suggestion) for applies, suggestion in INCOME_SUGGESTION_RULES if applies(income_analysis)]
     
     def create_income_dashboard_data(self, income_analysis: Dict) -> Dict:
         """Create dashboard data for income visualization"""
@@ -1,19 +1,93 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import numpy as np
-from typing import Dict, List
+from typing import Dict, List, Tuple
 
 from behavior_analyzer import BehaviorAnalyzer
 from markov_predictor import MarkovChainPredictor
+from utils import frame_fingerprint
+
+# Columns the behavior analysis reads; the analysis cache is keyed on these alone
+BEHAVIOR_INPUT_COLUMNS = ('Date', 'Amount', 'Category', 'Details', 'Time')
+
+# spending_predictions entries that are not per-category next-transaction predictions
+NON_CATEGORY_PREDICTION_KEYS = frozenset({'spending_sequences', 'monthly_forecast'})
+
+# Rows of the anomaly table rendered before the user asks for all of them
+ANOMALY_TABLE_MAX_ROWS = 500
+
+# Bar colours for next-transaction prediction confidence levels
+CONFIDENCE_COLORS = {
+    'High': 'green',
+    'Medium': 'orange',
+    'Low': 'red',
+    'Very Low': 'darkred'
+}
+
+# Slices in the anomalies-by-category pie; smaller categories are merged
+ANOMALY_PIE_MAX_SLICES = 12
+
+# High-risk anomaly indicators, indexed by risk level (score > 0.9, > 0.8, otherwise)
+RISK_LEVEL_ALERTS = (
+    (st.error, "🔴 Very High Risk"),
+    (st.warning, "🟡 High Risk"),
+    (st.info, "🔵 Medium Risk"),
+)
+
+# Recommendation groups in display order as (priority, heading, expander icon)
+RECOMMENDATION_PRIORITIES = (
+    ('High', "**🔴 High Priority:**", "🚨"),
+    ('Medium', "**🟡 Medium Priority:**", "⚠️"),
+    ('Low', "**🟢 Low Priority:**", "💡"),
+)
+
+# Plotly options shared by every behavior-analysis chart
+PLOTLY_CONFIG = {'displaylogo': False, 'responsive': True}
+
+def _show_figure(fig: go.Figure):
+    """Render a chart without transition animation; uirevision keeps zoom/selection across reruns"""
+    fig.update_layout(transition_duration=0, uirevision='markov')
+    st.plotly_chart(fig, use_container_width=True, config=PLOTLY_CONFIG)
+
+@st.cache_resource
+def get_analyzer() -> BehaviorAnalyzer:
+    """Analyzer shared across reruns for dashboard summaries; never trained in place"""
+    return BehaviorAnalyzer()
+
+def _transition_arrays(transitions: List[Dict]) -> Dict[str, np.ndarray]:
+    """Top transitions as parallel arrays; states are "<category>_<amount>_<time>", only categories are kept"""
+    return {
+        'from_category': np.array([t['from_state'].split('_', 1)[0] for t in transitions], dtype=object),
+        'to_category': np.array([t['to_state'].split('_', 1)[0] for t in transitions], dtype=object),
+        'probability': np.array([t['probability'] for t in transitions], dtype=np.float64),
+        'frequency': np.array([t['frequency'] for t in transitions], dtype=np.float64)
+    }
+
+@st.cache_data(show_spinner=False)
+def _analyze_behavior(fingerprint: bytes, order: int, _df: pd.DataFrame) -> Dict:
+    """Cached behavior analysis; the fingerprint stands in for hashing the whole frame"""
+    # Training mutates the model, so each miss fits its own rather than the shared analyzer
+    analyzer = BehaviorAnalyzer()
+    analyzer.markov_model = MarkovChainPredictor(order=order)
+    analysis = analyzer.analyze_behavior(_df)
+    analysis['model_stats'] = analyzer.markov_model.get_model_stats()
+    analysis['dashboard'] = analyzer.create_behavior_dashboard(analysis)
+    analysis['transition_arrays'] = _transition_arrays(
+        analysis.get('behavioral_patterns', {}).get('most_common_transitions', [])[:10]
+    )
+    analysis['category_predictions'] = {
+        key: value for key, value in analysis.get('spending_predictions', {}).items()
+        if key not in NON_CATEGORY_PREDICTION_KEYS
+    }
+    return analysis
 
 class MarkovInterface:
     """Streamlit interface for Markov Chain behavior analysis"""
     
     def __init__(self):
-        self.analyzer = BehaviorAnalyzer()
+        self.analyzer = get_analyzer()
     
     def render_markov_analysis(self, df: pd.DataFrame):
         """Render the complete Markov Chain analysis interface"""
@@ -24,32 +98,28 @@ class MarkovInterface:
         st.subheader("🧠 AI-Powered Behavior Analysis")
         st.write("Using Markov Chains to model your spending patterns and predict future behavior")
         
-        # Analysis tabs
-        analysis_tab1, analysis_tab2, analysis_tab3, analysis_tab4 = st.tabs([
-            "🔮 Predictions", "📊 Behavior Patterns", "⚠️ Anomaly Detection", "💡 Insights & Tips"
-        ])
+        # Analysis views; unlike st.tabs, only the selected view is built on a rerun
+        views = {
+            "🔮 Predictions": self._render_predictions_tab,
+            "📊 Behavior Patterns": self._render_patterns_tab,
+            "⚠️ Anomaly Detection": self._render_anomalies_tab,
+            "💡 Insights & Tips": self._render_insights_tab
+        }
+        selected_view = st.radio(
+            "Analysis view", list(views), key="markov_view", horizontal=True, label_visibility="collapsed"
+        )
         
         # Perform analysis (cached for performance)
         with st.spinner("🧠 Analyzing spending behavior with AI..."):
-            analysis = self._get_cached_analysis(df)
+            order = st.session_state.get('markov_order', self.analyzer.markov_model.order)
+            analysis = _analyze_behavior(frame_fingerprint(df, BEHAVIOR_INPUT_COLUMNS), order, df)
         
-        with analysis_tab1:
-            self._render_predictions_tab(analysis)
-        
-        with analysis_tab2:
-            self._render_patterns_tab(analysis)
-        
-        with analysis_tab3:
-            self._render_anomalies_tab(analysis)
-        
-        with analysis_tab4:
-            self._render_insights_tab(analysis)
+        views[selected_view](analysis)
     
-    @st.cache_data
-    def _get_cached_analysis(_self, df: pd.DataFrame) -> Dict:
-        """Cached analysis to avoid recomputation"""
-        analyzer = BehaviorAnalyzer()
-        return analyzer.analyze_behavior(df)
+    def _render_metric_row(self, metrics: List[Tuple]):
+        """Render (label, value) metrics side by side, one column each"""
+        for column, (label, value) in zip(st.columns(len(metrics)), metrics):
+            column.metric(label, value)
     
     def _render_predictions_tab(self, analysis: Dict):
         """Render predictions tab"""
@@ -58,21 +128,13 @@ class MarkovInterface:
         predictions = analysis.get('spending_predictions', {})
         
         # Model statistics
-        col1, col2, col3, col4 = st.columns(4)
-        
-        model_stats = self.analyzer.markov_model.get_model_stats()
-        
-        with col1:
-            st.metric("Model Status", model_stats.get('status', 'Unknown'))
-        
-        with col2:
-            st.metric("States Learned", model_stats.get('total_states', 0))
-        
-        with col3:
-            st.metric("Transitions", model_stats.get('total_transitions', 0))
-        
-        with col4:
-            st.metric("Patterns Found", model_stats.get('behavioral_patterns', 0))
+        model_stats = analysis.get('model_stats', {})
+        self._render_metric_row([
+            ("Model Status", model_stats.get('status', 'Unknown')),
+            ("States Learned", model_stats.get('total_states', 0)),
+            ("Transitions", model_stats.get('total_transitions', 0)),
+            ("Patterns Found", model_stats.get('behavioral_patterns', 0))
+        ])
         
         # Monthly spending forecast
         st.subheader("📈 Monthly Spending Forecast")
@@ -92,17 +154,23 @@ class MarkovInterface:
             forecast_df = pd.DataFrame(forecast_data)
             
             # Visualization
+            predicted = forecast_df['Predicted Amount'].to_numpy(dtype=float)
+            lower = forecast_df['Lower Bound'].to_numpy(dtype=float)
+            upper = forecast_df['Upper Bound'].to_numpy(dtype=float)
+            
+            # float32 is ample for bar heights and halves the serialized chart data;
+            # missing bounds stay NaN (no error bar)
             fig = go.Figure()
             
             fig.add_trace(go.Bar(
                 name='Predicted Amount',
-                x=forecast_df['Category'],
-                y=forecast_df['Predicted Amount'],
+                x=forecast_df['Category'].to_numpy(),
+                y=predicted.astype(np.float32),
                 error_y=dict(
                     type='data',
                     symmetric=False,
-                    array=forecast_df['Upper Bound'] - forecast_df['Predicted Amount'],
-                    arrayminus=forecast_df['Predicted Amount'] - forecast_df['Lower Bound']
+                    array=(upper - predicted).astype(np.float32),
+                    arrayminus=(predicted - lower).astype(np.float32)
                 )
             ))
             
@@ -113,20 +181,21 @@ class MarkovInterface:
                 showlegend=False
             )
             
-            st.plotly_chart(fig, use_container_width=True)
+            _show_figure(fig)
             
             # Forecast table
             st.write("**Detailed Forecast:**")
-            forecast_display = forecast_df.copy()
-            for col in ['Predicted Amount', 'Lower Bound', 'Upper Bound']:
-                forecast_display[col] = forecast_display[col].apply(lambda x: f"KSh {x:,.0f}")
+            # Format through a Styler so the table keeps numeric values underneath
+            money_format = 'KSh {:,.0f}'
+            forecast_display = forecast_df.style.format({
+                'Predicted Amount': money_format, 'Lower Bound': money_format, 'Upper Bound': money_format
+            })
             st.dataframe(forecast_display, use_container_width=True)
         
         # Next transaction predictions
         st.subheader("🎯 Next Transaction Predictions")
         
-        category_predictions = {k: v for k, v in predictions.items() 
-                              if k not in ['spending_sequences', 'monthly_forecast']}
+        category_predictions = analysis.get('category_predictions', {})
         
         if category_predictions:
             selected_category = st.selectbox(
@@ -140,33 +209,28 @@ class MarkovInterface:
                 col1, col2 = st.columns([2, 1])
                 
                 with col1:
-                    # Prediction chart
-                    pred_data = pd.DataFrame(next_predictions)
+                    # Prediction chart: one trace, coloured per bar by confidence
+                    confidences = [pred.get('confidence', 'Unknown') for pred in next_predictions]
                     
-                    fig = px.bar(
-                        pred_data,
-                        x='probability',
-                        y='category',
+                    fig = go.Figure(go.Bar(
+                        x=[pred['probability'] for pred in next_predictions],
+                        y=[pred['category'] for pred in next_predictions],
                         orientation='h',
-                        title=f"Next Transaction Predictions for {selected_category}",
-                        color='confidence',
-                        color_discrete_map={
-                            'High': 'green',
-                            'Medium': 'orange',
-                            'Low': 'red',
-                            'Very Low': 'darkred'
-                        }
-                    )
+                        marker_color=[CONFIDENCE_COLORS.get(confidence, 'gray') for confidence in confidences],
+                        customdata=confidences,
+                        hovertemplate="%{y}: %{x:.1%}<br>Confidence: %{customdata}<extra></extra>"
+                    ))
+                    fig.update_layout(title=f"Next Transaction Predictions for {selected_category}")
                     
-                    st.plotly_chart(fig, use_container_width=True)
+                    _show_figure(fig)
                 
                 with col2:
                     st.write("**Prediction Details:**")
                     for pred in next_predictions[:5]:
                         with st.expander(f"{pred['category']} ({pred['probability']:.1%})"):
-                            st.write(f"**Confidence:** {pred['confidence']}")
-                            st.write(f"**Amount Range:** {pred['amount_range']}")
-                            st.write(f"**Time Period:** {pred['time_period']}")
+                            st.write(f"**Confidence:** {pred.get('confidence', 'Unknown')}")
+                            st.write(f"**Amount Range:** {pred.get('amount_range', 'Unknown')}")
+                            st.write(f"**Time Period:** {pred.get('time_period', 'Unknown')}")
         
         # Spending sequences
         st.subheader("🔄 Predicted Spending Sequences")
@@ -191,8 +255,8 @@ class MarkovInterface:
         
         patterns = analysis.get('behavioral_patterns', {})
         
-        # Behavior score
-        dashboard = self.analyzer.create_behavior_dashboard(analysis)
+        # Behavior score (dashboard built once with the cached analysis)
+        dashboard = analysis.get('dashboard', {})
         summary_metrics = dashboard.get('summary_metrics', {})
         
         col1, col2, col3, col4 = st.columns(4)
@@ -217,25 +281,18 @@ class MarkovInterface:
         # Most common transitions
         st.subheader("🔄 Most Common Spending Transitions")
         
-        transitions = patterns.get('most_common_transitions', [])
-        if transitions:
-            transition_data = []
-            for trans in transitions[:10]:
-                from_parts = trans['from_state'].split('_')
-                to_parts = trans['to_state'].split('_')
-                
-                transition_data.append({
-                    'From Category': from_parts[0] if from_parts else 'Unknown',
-                    'To Category': to_parts[0] if to_parts else 'Unknown',
-                    'Probability': f"{trans['probability']:.1%}",
-                    'Frequency': f"{trans['frequency']:.0f}"
-                })
-            
-            transition_df = pd.DataFrame(transition_data)
+        transitions = analysis.get('transition_arrays', {})
+        if len(transitions.get('probability', ())):
+            transition_df = pd.DataFrame({
+                'From Category': transitions['from_category'],
+                'To Category': transitions['to_category'],
+                'Probability': [f"{p:.1%}" for p in transitions['probability']],
+                'Frequency': [f"{f:.0f}" for f in transitions['frequency']]
+            })
             st.dataframe(transition_df, use_container_width=True)
             
             # Transition network visualization
-            self._create_transition_network(transitions[:8])
+            self._create_transition_network(transitions, 8)
         
         # Spending habits analysis
         st.subheader("🎯 Spending Habits Analysis")
@@ -246,21 +303,15 @@ class MarkovInterface:
         
         with col1:
             st.write("**Daily Preferences:**")
-            daily_prefs = habits.get('daily_preferences', {})
-            for day, categories in daily_prefs.items():
-                if categories:
-                    top_category = categories[0][0] if categories[0] else 'None'
-                    count = categories[0][1] if categories[0] else 0
-                    st.write(f"• {day}: {top_category} ({count} times)")
+            daily_table = self._preference_table("Day", habits.get('daily_preferences', {}))
+            if daily_table:
+                st.markdown(daily_table)
         
         with col2:
             st.write("**Time-based Preferences:**")
-            time_prefs = habits.get('time_preferences', {})
-            for period, categories in time_prefs.items():
-                if categories:
-                    top_category = categories[0][0] if categories[0] else 'None'
-                    count = categories[0][1] if categories[0] else 0
-                    st.write(f"• {period}: {top_category} ({count} times)")
+            time_table = self._preference_table("Time", habits.get('time_preferences', {}))
+            if time_table:
+                st.markdown(time_table)
         
         # Category preferences
         st.subheader("📈 Category Transition Preferences")
@@ -287,6 +338,20 @@ class MarkovInterface:
                 pref_df = pd.DataFrame(pref_data)
                 st.dataframe(pref_df, use_container_width=True)
     
+    def _preference_table(self, label: str, preferences: Dict) -> str:
+        """Markdown table of the top category (and its count) per day or time period; empty if none"""
+        rows = []
+        for key, categories in preferences.items():
+            if categories:
+                top_category = categories[0][0] if categories[0] else 'None'
+                count = categories[0][1] if categories[0] else 0
+                # Escape pipes so names taken from transaction details stay in their cell
+                cells = (str(cell).replace('|', '\\|') for cell in (key, top_category, count))
+                rows.append("| " + " | ".join(cells) + " |")
+        if not rows:
+            return ""
+        return "\n".join([f"| {label} | Top Category | Times |", "|---|---|---|"] + rows)
+    
     def _render_anomalies_tab(self, analysis: Dict):
         """Render anomaly detection tab"""
         st.subheader("⚠️ Anomaly Detection")
@@ -294,33 +359,28 @@ class MarkovInterface:
         anomaly_data = analysis.get('anomaly_detection', {})
         
         # Anomaly summary
-        col1, col2, col3, col4 = st.columns(4)
-        
-        with col1:
-            st.metric("Total Anomalies", anomaly_data.get('total_anomalies', 0))
-        
-        with col2:
-            st.metric("Anomaly Rate", f"{anomaly_data.get('anomaly_rate', 0):.1f}%")
-        
-        with col3:
-            high_risk = len(anomaly_data.get('high_risk_anomalies', []))
-            st.metric("High Risk", high_risk)
-        
-        with col4:
-            categories_affected = len(anomaly_data.get('anomaly_categories', {}))
-            st.metric("Categories Affected", categories_affected)
+        self._render_metric_row([
+            ("Total Anomalies", anomaly_data.get('total_anomalies', 0)),
+            ("Anomaly Rate", f"{anomaly_data.get('anomaly_rate', 0):.1f}%"),
+            ("High Risk", len(anomaly_data.get('high_risk_anomalies', []))),
+            ("Categories Affected", len(anomaly_data.get('anomaly_categories', {})))
+        ])
         
         # Anomaly categories breakdown
         anomaly_categories = anomaly_data.get('anomaly_categories', {})
         if anomaly_categories:
             st.subheader("📊 Anomalies by Category")
             
-            fig = px.pie(
-                values=list(anomaly_categories.values()),
-                names=list(anomaly_categories.keys()),
-                title="Distribution of Anomalies by Category"
-            )
-            st.plotly_chart(fig, use_container_width=True)
+            # Largest slices first, pre-sorted so Plotly need not sort; the tail is merged
+            slices = sorted(anomaly_categories.items(), key=lambda item: item[1], reverse=True)
+            if len(slices) > ANOMALY_PIE_MAX_SLICES:
+                keep = ANOMALY_PIE_MAX_SLICES - 1
+                slices = slices[:keep] + [("Other categories", sum(count for _, count in slices[keep:]))]
+            labels, values = zip(*slices)
+            
+            fig = go.Figure(go.Pie(labels=labels, values=values, sort=False))
+            fig.update_layout(title="Distribution of Anomalies by Category")
+            _show_figure(fig)
         
         # High-risk anomalies
         high_risk_anomalies = anomaly_data.get('high_risk_anomalies', [])
@@ -328,32 +388,37 @@ class MarkovInterface:
             st.subheader("🚨 High-Risk Anomalies")
             st.write("These transactions are highly unusual based on your spending patterns:")
             
-            for anomaly in high_risk_anomalies[:10]:
+            top_anomalies = high_risk_anomalies[:10]
+            scores = np.fromiter((anomaly['anomaly_score'] for anomaly in top_anomalies), dtype=float, count=len(top_anomalies))
+            risk_levels = np.select([scores > 0.9, scores > 0.8], [0, 1], default=2)
+            
+            for anomaly, risk_level in zip(top_anomalies, risk_levels):
                 with st.expander(f"{anomaly['date']} - {anomaly['category']} - KSh {anomaly['amount']:,.0f}"):
                     st.write(f"**Transaction:** {anomaly['details']}")
                     st.write(f"**Anomaly Score:** {anomaly['anomaly_score']:.1%}")
                     st.write(f"**Reason:** {anomaly['reason']}")
                     
                     # Risk level indicator
-                    if anomaly['anomaly_score'] > 0.9:
-                        st.error("🔴 Very High Risk")
-                    elif anomaly['anomaly_score'] > 0.8:
-                        st.warning("🟡 High Risk")
-                    else:
-                        st.info("🔵 Medium Risk")
+                    show_alert, label = RISK_LEVEL_ALERTS[risk_level]
+                    show_alert(label)
         
         # All anomalies table
         all_anomalies = anomaly_data.get('anomalies', [])
         if all_anomalies:
             st.subheader("📋 All Detected Anomalies")
             
+            # Only the capped slice becomes a DataFrame unless everything is requested
+            if len(all_anomalies) > ANOMALY_TABLE_MAX_ROWS and not st.checkbox(
+                f"Show all {len(all_anomalies)} anomalies", key="show_all_anomalies"
+            ):
+                all_anomalies = all_anomalies[:ANOMALY_TABLE_MAX_ROWS]
+            
             anomaly_df = pd.DataFrame(all_anomalies)
             if not anomaly_df.empty:
                 # Format for display
-                display_df = anomaly_df[['date', 'category', 'amount', 'anomaly_score', 'reason']].copy()
-                display_df['date'] = pd.to_datetime(display_df['date']).dt.strftime('%Y-%m-%d')
-                display_df['amount'] = display_df['amount'].apply(lambda x: f"KSh {x:,.0f}")
-                display_df['anomaly_score'] = display_df['anomaly_score'].apply(lambda x: f"{x:.1%}")
+                display_df = anomaly_df[['date', 'category', 'amount', 'anomaly_score', 'reason']].assign(
+                    date=anomaly_df['date_str']
+                ).style.format({'amount': 'KSh {:,.0f}', 'anomaly_score': '{:.1%}'})
                 
                 st.dataframe(display_df, use_container_width=True)
     
@@ -367,8 +432,7 @@ class MarkovInterface:
         
         if insights:
             st.subheader("🧠 Key Behavioral Insights")
-            for insight in insights:
-                st.info(f"💡 {insight}")
+            st.info("\n\n".join(f"💡 {insight}" for insight in insights))
         
         # Risk assessment
         risks = analysis.get('risk_assessment', {})
@@ -398,34 +462,23 @@ class MarkovInterface:
         if recommendations:
             st.subheader("🎯 Personalized Recommendations")
             
-            # Group by priority
-            high_priority = [r for r in recommendations if r.get('priority') == 'High']
-            medium_priority = [r for r in recommendations if r.get('priority') == 'Medium']
-            low_priority = [r for r in recommendations if r.get('priority') == 'Low']
+            # Group by priority in one pass; unknown priorities are not shown
+            by_priority = {priority: [] for priority, _, _ in RECOMMENDATION_PRIORITIES}
+            for rec in recommendations:
+                bucket = by_priority.get(rec.get('priority'))
+                if bucket is not None:
+                    bucket.append(rec)
             
-            if high_priority:
-                st.write("**🔴 High Priority:**")
-                for rec in high_priority:
-                    with st.expander(f"🚨 {rec['title']}"):
-                        st.write(f"**Issue:** {rec['description']}")
-                        st.write(f"**Action:** {rec['action']}")
-                        st.write(f"**Expected Impact:** {rec['impact']}")
-            
-            if medium_priority:
-                st.write("**🟡 Medium Priority:**")
-                for rec in medium_priority:
-                    with st.expander(f"⚠️ {rec['title']}"):
-                        st.write(f"**Issue:** {rec['description']}")
-                        st.write(f"**Action:** {rec['action']}")
-                        st.write(f"**Expected Impact:** {rec['impact']}")
-            
-            if low_priority:
-                st.write("**🟢 Low Priority:**")
-                for rec in low_priority:
-                    with st.expander(f"💡 {rec['title']}"):
-                        st.write(f"**Issue:** {rec['description']}")
-                        st.write(f"**Action:** {rec['action']}")
-                        st.write(f"**Expected Impact:** {rec['impact']}")
+            for priority, heading, icon in RECOMMENDATION_PRIORITIES:
+                if by_priority[priority]:
+                    st.write(heading)
+                    for rec in by_priority[priority]:
+                        with st.expander(f"{icon} {rec['title']}"):
+                            st.markdown(
+                                f"**Issue:** {rec['description']}\n\n"
+                                f"**Action:** {rec['action']}\n\n"
+                                f"**Expected Impact:** {rec['impact']}"
+                            )
         
         # Habit analysis
         habit_analysis = analysis.get('habit_analysis', {})
@@ -456,25 +509,15 @@ class MarkovInterface:
                 else:
                     st.success("Moderate transaction frequency - balanced approach")
     
-    def _create_transition_network(self, transitions: List[Dict]):
-        """Create a network visualization of state transitions"""
+    def _create_transition_network(self, transitions: Dict[str, np.ndarray], limit: int):
+        """Create a network visualization of the first `limit` state transitions"""
         st.subheader("🕸️ Spending Transition Network")
         
-        # Create network data
-        nodes = set()
-        edges = []
-        
-        for trans in transitions:
-            from_state = trans['from_state'].split('_')[0]  # Get category only
-            to_state = trans['to_state'].split('_')[0]
-            probability = trans['probability']
-            
-            nodes.add(from_state)
-            nodes.add(to_state)
-            edges.append((from_state, to_state, probability))
-        
         # Create a simple network representation
         st.write("**Top Spending Transitions:**")
+        edges = zip(
+            transitions['from_category'][:limit], transitions['to_category'][:limit], transitions['probability'][:limit]
+        )
         for from_state, to_state, prob in edges:
             st.write(f"• {from_state} → {to_state} ({prob:.1%})")
     
@@ -484,11 +527,14 @@ class MarkovInterface:
         
         col1, col2 = st.columns(2)
         
+        orders = [1, 2, 3]
+        current_order = st.session_state.get('markov_order', self.analyzer.markov_model.order)
+        
         with col1:
             order = st.selectbox(
                 "Markov Chain Order",
-                options=[1, 2, 3],
-                value=2,
+                options=orders,
+                index=orders.index(current_order),
                 help="Higher order captures more complex patterns but requires more data"
             )
         
@@ -503,6 +549,7 @@ class MarkovInterface:
             )
         
         if st.button("Update Model Configuration"):
-            self.analyzer.markov_model = MarkovChainPredictor(order=order)
+            # The order is part of the analysis cache key, so the next render refits
+            st.session_state['markov_order'] = order
             st.success("Model configuration updated!")
             st.rerun()
\ No newline at end of file
@@ -57,12 +57,13 @@ class MarkovChainPredictor:
         
         # Create sequence states for higher-order chains
         if self.order > 1:
-            # Create sequences manually to avoid rolling window issues with strings
-            sequences = []
-            for i in range(len(df)):
-                start_idx = max(0, i - self.order + 1)
-                sequence_states = df['Behavioral_State'].iloc[start_idx:i+1].tolist()
-                sequences.append('|'.join(sequence_states))
+            # Join the shifted state columns oldest-first; rows near the start have
+            # fewer predecessors, so their sequences are just left unprefixed
+            states = df['Behavioral_State']
+            sequences = states.shift(self.order - 1)
+            for k in range(self.order - 2, -1, -1):
+                shifted = states.shift(k)
+                sequences = (sequences + '|' + shifted).fillna(shifted)
             df['State_Sequence'] = sequences
         else:
             df['State_Sequence'] = df['Behavioral_State']
@@ -136,16 +137,18 @@ class MarkovChainPredictor:
     
     def _build_amount_transitions(self, df: pd.DataFrame) -> None:
         """Build amount transition patterns"""
-        for i in range(len(df) - 1):
-            current_state = df.iloc[i]['Behavioral_State']
-            next_amount = abs(df.iloc[i + 1]['Amount'])
+        states = df['Behavioral_State'].to_numpy()
+        next_amounts = np.abs(df['Amount'].to_numpy())[1:]
+        for current_state, next_amount in zip(states[:-1], next_amounts):
             self.amount_transitions[current_state]['amounts'].append(next_amount)
     
     def _build_time_transitions(self, df: pd.DataFrame) -> None:
         """Build time-based transition patterns"""
-        for i in range(len(df) - 1):
-            current_state = df.iloc[i]['Behavioral_State']
-            time_diff = (df.iloc[i + 1]['Date'] - df.iloc[i]['Date']).total_seconds() / 3600  # hours
+        states = df['Behavioral_State'].to_numpy()
+        dates = df['Date'].to_numpy(dtype='datetime64[ns]')
+        # Gaps in hours, truncated to microseconds as Timedelta.total_seconds() does
+        time_diffs = (np.diff(dates).astype('timedelta64[us]') / np.timedelta64(1, 's') / 3600).tolist()
+        for current_state, time_diff in zip(states[:-1], time_diffs):
             self.time_transitions[current_state]['intervals'].append(time_diff)
     
     def _identify_behavioral_patterns(self, df: pd.DataFrame) -> None:
@@ -2,6 +2,7 @@
 Simple test script to verify the app functionality
 """
 
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 from income_tracker import IncomeTracker
@@ -59,5 +60,53 @@ def test_basic_functionality():
     print("\n🎉 All components tested successfully!")
     print("The app should work correctly when run with Streamlit.")
 
+def test_income_analysis_monthly_payload():
+    """Test that monthly income comes back as aligned month-end dates and values"""
+    print("🧪 Testing monthly income payload")
+    
+    df = pd.DataFrame([
+        {'Date': datetime(2024, 1, 5), 'Details': 'Salary Payment', 'Amount': 80000, 'Category': 'Income'},
+        {'Date': datetime(2024, 1, 20), 'Details': 'Freelance Payment', 'Amount': 20000, 'Category': 'Income'},
+        {'Date': datetime(2024, 2, 10), 'Details': 'Naivas Supermarket', 'Amount': -5000, 'Category': 'Food'},
+        {'Date': datetime(2024, 3, 5), 'Details': 'Salary Payment', 'Amount': 80000, 'Category': 'Income'},
+    ])
+    
+    income_analysis = IncomeTracker().analyze_income_patterns(df)
+    
+    assert 'monthly_income' not in income_analysis
+    dates = income_analysis['monthly_income_dates']
+    values = income_analysis['monthly_income_values']
+    
+    # February had no income but still gets a zero month between January and March
+    expected_dates = pd.to_datetime(['2024-01-31', '2024-02-29', '2024-03-31']).to_numpy()
+    assert np.array_equal(dates, expected_dates)
+    assert np.array_equal(values, [100000.0, 0.0, 80000.0])
+    assert income_analysis['total_income'] == 180000
+    assert income_analysis['monthly_average'] == 60000
+    print(f"   ✅ {len(dates)} months: {', '.join(f'{v:,.0f}' for v in values)}")
+    
+    return True
+
+def test_monthly_totals_single_month():
+    """Test the single-month shortcut in IncomeTracker._monthly_totals"""
+    print("🧪 Testing single-month income totals")
+    
+    dates = pd.to_datetime(['2024-02-01 08:00', '2024-02-15 12:30', None, '2024-02-29 23:00']).to_numpy()
+    amounts = np.array([1000.0, np.nan, 5000.0, 250.0])
+    
+    # The undated row is dropped and the missing amount adds nothing
+    totals = IncomeTracker()._monthly_totals(dates, amounts)
+    assert list(totals.index) == [pd.Timestamp('2024-02-29')]
+    assert totals.tolist() == [1250.0]
+    
+    # No dated rows at all gives an empty series
+    empty = IncomeTracker()._monthly_totals(dates[2:3], amounts[2:3])
+    assert empty.empty
+    print(f"   ✅ February total: KSh {totals.iloc[0]:,.0f}")
+    
+    return True
+
 if __name__ == "__main__":
-    test_basic_functionality()
\ No newline at end of file
+    test_basic_functionality()
+    test_income_analysis_monthly_payload()
+    test_monthly_totals_single_month()
\ No newline at end of file
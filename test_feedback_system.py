@@ -4,6 +4,8 @@ Test script for the feedback and donation system
 
 import json
 import os
+import stat
+import tempfile
 from feedback_donation_system import FeedbackDonationSystem
 
 def test_feedback_system():
@@ -68,7 +70,7 @@ def test_feedback_system():
         'feedback_donation_system.py',
         'donation_config.json',
         'admin_feedback.py',
-        'user_feedback.json'
+        'user_feedback.jsonl'
     ]
     
     for file in files_to_check:
@@ -82,17 +84,66 @@ def test_feedback_system():
     # Cleanup test data (optional)
     cleanup = input("\n🗑️ Remove test feedback data? (y/n): ").lower().strip()
     if cleanup == 'y':
-        if os.path.exists('user_feedback.json'):
+        if os.path.exists('user_feedback.jsonl'):
             # Remove only test entries
             feedback_data = system.load_feedback_data()
             cleaned_data = [f for f in feedback_data if f.get('name') != 'Test User']
             
-            with open('user_feedback.json', 'w') as f:
-                json.dump(cleaned_data, f, indent=2)
+            with open('user_feedback.jsonl', 'w') as f:
+                for feedback in cleaned_data:
+                    f.write(json.dumps(feedback) + '\n')
             
             print("   ✅ Test data cleaned up")
         else:
             print("   ℹ️ No test data to clean")
 
+def test_legacy_feedback_migration():
+    """Test that user_feedback.json is converted to JSON Lines and ids continue from it"""
+    print("🧪 Testing legacy feedback migration")
+    
+    original_dir = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        try:
+            legacy_feedback = [
+                {"id": 1, "type": "Bug Report", "rating": 3, "feedback": "First"},
+                {"id": 2, "type": "Feature Request", "rating": 5, "feedback": "Second"}
+            ]
+            with open('user_feedback.json', 'w') as f:
+                json.dump(legacy_feedback, f)
+            
+            system = FeedbackDonationSystem()
+            
+            # One JSON object per line, in the original order
+            assert os.path.exists('user_feedback.jsonl')
+            with open('user_feedback.jsonl') as f:
+                lines = [json.loads(line) for line in f if line.strip()]
+            assert lines == legacy_feedback
+            assert system.load_feedback_data() == legacy_feedback
+            print("   ✅ Legacy feedback migrated to JSON Lines")
+            
+            # The migrated file gets the same permissions as any newly created file
+            with open('plain_file.txt', 'w'):
+                pass
+            assert stat.S_IMODE(os.stat('user_feedback.jsonl').st_mode) == stat.S_IMODE(os.stat('plain_file.txt').st_mode)
+            print("   ✅ Migrated file keeps the default permissions")
+            
+            # New feedback is appended with the next id after the migrated entries
+            system.save_feedback({"type": "General Feedback", "rating": 4, "feedback": "Third"})
+            feedback_data = system.load_feedback_data()
+            assert [feedback['id'] for feedback in feedback_data] == [1, 2, 3]
+            assert feedback_data[-1]['feedback'] == "Third"
+            print("   ✅ New feedback continues at id 3")
+            
+            # A second instance does not migrate again over the existing file
+            FeedbackDonationSystem().save_feedback({"type": "Bug Report", "rating": 2, "feedback": "Fourth"})
+            assert [feedback['id'] for feedback in system.load_feedback_data()] == [1, 2, 3, 4]
+            print("   ✅ Existing JSON Lines file is left as is")
+        finally:
+            os.chdir(original_dir)
+    
+    return True
+
 if __name__ == "__main__":
+    test_legacy_feedback_migration()
     test_feedback_system()
\ No newline at end of file
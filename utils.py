@@ -1,7 +1,36 @@
+import hashlib
 import pandas as pd
 import io
+import json
 from datetime import datetime
 
+try:
+    import orjson
+except ImportError:  # optional dependency; fall back to the standard library codec
+    orjson = None
+
+def json_dumps(obj, indent: bool = False) -> bytes:
+    """Serialize obj to UTF-8 JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else None)
+    return json.dumps(obj, indent=2 if indent else None).encode('utf-8')
+
+def json_loads(data):
+    """Parse JSON from bytes or str"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def frame_fingerprint(df: pd.DataFrame, columns) -> bytes:
+    """Digest of the given columns (those present in df), in row order"""
+    columns = [column for column in columns if column in df.columns]
+    row_hashes = pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+    
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(','.join(columns).encode())
+    digest.update(row_hashes.tobytes())
+    return digest.digest()
+
 def export_to_csv(df: pd.DataFrame) -> str:
     """Export DataFrame to CSV string"""
     output = io.StringIO()